@@ -2,6 +2,13 @@ import bpy
 import gompy, gompy.types.OGF as OGF, gompy.gom as gom
 import numpy as np
 import random
+import sys, os
+
+# ReflectionCache is shared with PyGraphite
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','PyGraphite')
+)
+from reflection_cache import ReflectionCache
 
 # Usage: blender --python GraphiteInBlender.py
 #  Load mandaros_uvw.geogram
@@ -43,6 +50,47 @@ for area in bpy.context.screen.areas:
             if space.type == 'VIEW_3D':
                 space.shading.color_type = 'OBJECT'
 
+# Copies vertices and polygons to a Blender mesh, using bulk transfers
+# (foreach_set) from NumPy arrays rather than Python loops.
+#  verts: vertices coordinates, one row per vertex (only 3 first coords used)
+#  corners: vertex of each polygon corner, polygons are stored contiguously
+#  loop_totals: number of corners of each polygon
+# If polygons did not change, the mesh datablock is kept and only the
+# coordinates are updated.
+def send_mesh_to_blender(bmesh, verts, corners, loop_totals):
+   corners = np.ascontiguousarray(corners, dtype=np.int32).reshape(-1)
+   loop_totals = np.ascontiguousarray(loop_totals, dtype=np.int32)
+   same_topology = (
+      len(bmesh.vertices) == verts.shape[0] and
+      len(bmesh.polygons) == loop_totals.shape[0] and
+      len(bmesh.loops) == corners.shape[0]
+   )
+   if same_topology:
+      old_corners = np.empty(corners.shape[0], dtype=np.int32)
+      bmesh.loops.foreach_get('vertex_index', old_corners)
+      old_totals = np.empty(loop_totals.shape[0], dtype=np.int32)
+      bmesh.polygons.foreach_get('loop_total', old_totals)
+      same_topology = (
+         np.array_equal(old_corners, corners) and
+         np.array_equal(old_totals, loop_totals)
+      )
+   if not same_topology:
+      bmesh.clear_geometry()
+      bmesh.vertices.add(verts.shape[0])
+      bmesh.loops.add(corners.shape[0])
+      bmesh.polygons.add(loop_totals.shape[0])
+      bmesh.loops.foreach_set('vertex_index', corners)
+      loop_starts = np.zeros(loop_totals.shape[0], dtype=np.int32)
+      np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+      bmesh.polygons.foreach_set('loop_start', loop_starts)
+      # loop_total is deduced from loop_start (and read-only) in Blender 4
+      if not bmesh.polygons.bl_rna.properties['loop_total'].is_readonly:
+         bmesh.polygons.foreach_set('loop_total', loop_totals)
+   bmesh.vertices.foreach_set(
+      'co', np.ascontiguousarray(verts[:,0:3], dtype=np.float32).reshape(-1)
+   )
+   bmesh.update(calc_edges = not same_topology)
+
 # Converts a Graphite object to a Blender object
 def send_object_to_blender(obj):
    verts = np.asarray(obj.I.Editor.get_points())
@@ -52,22 +100,33 @@ def send_object_to_blender(obj):
       bmesh = bpy.data.meshes['GI.' + obj.name + '.mesh']
    except:
       bmesh = bpy.data.meshes.new('GI.' + obj.name + '.mesh')
+   send_mesh_to_blender(
+      bmesh, verts, faces, np.full(faces.shape[0], faces.shape[1])
+   )
+   # Transform and color are only initialized for new objects, so that
+   # the ones set by the user are kept when the object is updated
    try:
       bobj  = bpy.data.objects['GI.' + obj.name]
    except:
       bobj  = bpy.data.objects.new('GI.' + obj.name, bmesh)
-   bobj.location = [0, 0, 0]
-   bmesh.clear_geometry()
-   bmesh.from_pydata(verts, [], faces)
-   bmesh.update(calc_edges=True)
+      bobj.location = [0, 0, 0]
+      bobj.color = [ # or use 'random color' mode in viewer
+         random.uniform(0,1),
+         random.uniform(0,1),
+         random.uniform(0,1),
+         1
+      ]
    if bpy.context.collection.objects.find(bobj.name) == -1:
       bpy.context.collection.objects.link(bobj)
-   bpy.data.objects[bobj.name].color = [ # or use 'random color' mode in viewer
-      random.uniform(0,1),
-      random.uniform(0,1),
-      random.uniform(0,1),
-      1
-   ]
+
+# Removes the Blender object and mesh associated with a Graphite object
+def remove_object_from_blender(name):
+   bobj = bpy.data.objects.get('GI.' + name)
+   if bobj != None:
+      bpy.data.objects.remove(bobj)
+   bmesh = bpy.data.meshes.get('GI.' + name + '.mesh')
+   if bmesh != None:
+      bpy.data.meshes.remove(bmesh)
 
 # Sends all Graphite objects to Blender
 def send_objects_to_blender(prefix = ''):
@@ -92,6 +151,79 @@ def clean_blender():
     clean_blender_collection(bpy.data.objects)
     clean_blender_collection(bpy.context.collection.objects)
 
+# Keeps Blender objects in sync with Graphite objects. Graphite objects
+# modified since last call to flush() are recorded, by listening to the
+# value_changed signal of each object and to the values_changed signal of
+# the SceneGraph (objects created, deleted or renamed). flush() only
+# creates, updates or removes the Blender objects of these Graphite objects.
+# The script may be run several times in the same Blender session: the
+# BlenderSync of the previous run is stored in bpy.app.driver_namespace and
+# stopped, so that signals are not handled twice.
+class BlenderSync:
+    scene_graph = None
+    scene_graph_connection = None # connection to values_changed
+    connections = {} # Graphite object name -> connection to value_changed
+    dirty = set()    # names of the objects to be sent to Blender
+    removed = set()  # names of the objects to be removed from Blender
+
+    def start(scene_graph):
+        """ Starts listening to the signals of a SceneGraph """
+        previous = bpy.app.driver_namespace.get('GI_BlenderSync', None)
+        if previous != None:
+            previous.stop()
+        bpy.app.driver_namespace['GI_BlenderSync'] = BlenderSync
+        BlenderSync.stop()
+        BlenderSync.scene_graph = scene_graph
+        BlenderSync.scene_graph_connection = gom.connect(
+            scene_graph.values_changed, BlenderSync.values_changed_CB
+        )
+        BlenderSync.values_changed_CB(
+            ';'.join([obj.name for obj in scene_graph.objects])
+        )
+        BlenderSync.flush()
+
+    def stop():
+        """ Stops listening to the signals of the SceneGraph """
+        if BlenderSync.scene_graph_connection != None:
+            BlenderSync.scene_graph_connection.remove()
+            BlenderSync.scene_graph_connection = None
+        for connection in BlenderSync.connections.values():
+            connection.remove()
+        BlenderSync.connections = {}
+        BlenderSync.dirty = set()
+        BlenderSync.removed = set()
+        BlenderSync.scene_graph = None
+
+    def values_changed_CB(new_list):
+        """ Called whenever the list of Graphite objects changed """
+        new_list = set() if new_list == '' else set(new_list.split(';'))
+        for name in BlenderSync.connections.keys() - new_list:
+            BlenderSync.connections.pop(name).remove()
+            BlenderSync.dirty.discard(name)
+            BlenderSync.removed.add(name)
+        for name in new_list - BlenderSync.connections.keys():
+            BlenderSync.connections[name] = gom.connect(
+                BlenderSync.scene_graph.resolve(name).value_changed,
+                BlenderSync.value_changed_CB
+            )
+            BlenderSync.dirty.add(name)
+            BlenderSync.removed.discard(name)
+
+    def value_changed_CB(grob):
+        """ Called whenever a Graphite object changed """
+        BlenderSync.dirty.add(grob.name)
+
+    def flush():
+        """ Sends the objects that changed to Blender """
+        for name in BlenderSync.removed:
+            remove_object_from_blender(name)
+        for name in BlenderSync.dirty:
+            obj = BlenderSync.scene_graph.resolve(name)
+            if obj.is_a(OGF.MeshGrob):
+                send_object_to_blender(obj)
+        BlenderSync.removed = set()
+        BlenderSync.dirty = set()
+
 # ------------------------------------------------------
 
 # Create SceneGraph if not already created (we may want
@@ -107,6 +239,7 @@ if sg == None:
 #   C.I.Shapes.create_box([-1, -1, -1],[1, 1, 1])
 #   C.I.Surface.triangulate()
 #   send_objects_to_blender()
+BlenderSync.start(sg)
 
 # ------------------------------------------------------
 
@@ -115,12 +248,14 @@ class AutoGUI:
     """ Creates Blender property editor for command arguments
         based on their types and dialog boxes for Graphite commands """
 
-    def editor_for_arg(name: str, mtype: OGF.MetaType, val: str, help: str):
+    operators = {} # operator id -> operator class, created on demand
+
+    def editor_for_arg(name: str, type_name: str, val: str, help: str):
         help = name if help == None else help
-        editor_name = mtype.name.replace(' ','_').replace(':','_') + '_editor'
+        editor_name = type_name.replace(' ','_').replace(':','_') + '_editor'
         if hasattr(AutoGUI, editor_name):
-            return getattr(AutoGUI, editor_name)(name, mtype, val, help)
-        return AutoGUI.string_editor(name, mtype, val, help)
+            return getattr(AutoGUI, editor_name)(name, type_name, val, help)
+        return AutoGUI.string_editor(name, type_name, val, help)
 
     def string_editor(name, mtype, val, help):
         if val == None:
@@ -164,24 +299,26 @@ class AutoGUI:
                 name=name, default=(val == 'true'), description=help
             )
 
-    def operator_id(mmethod: OGF.MetaMethod):
-        return 'wm.gi_operator_' + mmethod.name.lower()
+    def operator_id(item: tuple):
+        return 'wm.gi_operator_' + item[1].lower()
 
     def menu_id(path: str):
         return 'OBJECT_MT_GI_' + \
             path.replace('/','_').replace(' ','_').replace('-','_') + '_menu'
 
-    def create_operator_for_method(mmethod_in: OGF.MetaMethod):
-        """ Creates a Blender operator class from an OGF MetaSlot """
+    def create_operator_for_method(item_in: tuple):
+        """ Creates a Blender operator class from a menu item, that is,
+            the (commands class name, method name, help, args) of a
+            Graphite command, stored by ReflectionCache """
 
         # This is a locally defined class, creates a different class
         # at each invokation of this function ! (I love Python for that)
         class GIDynamicOperator(bpy.types.Operator):
-            mmethod = mmethod_in
-            bl_idname = AutoGUI.operator_id(mmethod)
-            bl_label = mmethod.name.replace('_',' ')
-            if mmethod.has_custom_attribute('help'):
-                bl_description = mmethod.custom_attribute_value('help')
+            mclass_name, method_name, help, args = item_in
+            bl_idname = AutoGUI.operator_id(item_in)
+            bl_label = method_name.replace('_',' ')
+            if help != '':
+                bl_description = help
 
             def get_target(self,context):
                 """ Gets target of the Graphite command from Blender context"""
@@ -204,19 +341,17 @@ class AutoGUI:
                 if target == None:
                     return {'FINISHED'}
                 args = {}
-                for i in range(mmethod.nb_args()):
-                    arg_name = mmethod.ith_arg_name(i)
+                for arg in GIDynamicOperator.args:
+                    arg_name = arg[0]
                     arg_val = getattr(self,arg_name)
                     args[arg_name] = arg_val
-                request = OGF.Request(
-                    target.query_interface(
-                        self.mmethod.container_meta_class().name
-                    ),
-                    self.mmethod
+                # the meta-method is only resolved when the command is used
+                request = getattr(
+                    target.query_interface(GIDynamicOperator.mclass_name),
+                    GIDynamicOperator.method_name
                 )
                 request(**args) #**: expand dict as keywords func call
-                clean_blender()
-                send_objects_to_blender()
+                BlenderSync.flush()
                 return {'FINISHED'}
 
             def invoke(self, context, event):
@@ -224,27 +359,20 @@ class AutoGUI:
                 wm = context.window_manager
                 return wm.invoke_props_dialog(self)
 
-            def __init__(self):
-                mmethod = GIDynamicOperator.mmethod
-
         # Create the editors for all arguments using AutoGUI.editor_for_arg()
         # Store the editors in the *annotations* ! (this is where Blender's
         # function invoke_props_dialog() expects to find them !!!)
-        mmethod = GIDynamicOperator.mmethod
-        for i in range(mmethod.nb_args()):
-            real_arg_name = mmethod.ith_arg_name(i)
+        # Names, types, default values and help of the arguments come from
+        # ReflectionCache, no GOM reflection is needed here.
+        for real_arg_name, arg_type, arg_val, arg_desc in item_in[3]:
             arg_name = real_arg_name.replace('_',' ')
-            arg_type = mmethod.ith_arg_type(i)
-            arg_val = None
-            arg_desc = arg_name
-            if mmethod.ith_arg_has_default_value(i):
-                arg_val = mmethod.ith_arg_default_value_as_string(i)
-            if mmethod.ith_arg_has_custom_attribute(i, 'help'):
-                arg_desc = mmethod.ith_arg_custom_attribute_value(i, 'help')
+            if arg_desc == None:
+                arg_desc = arg_name
             GIDynamicOperator.__annotations__[real_arg_name] = \
                 AutoGUI.editor_for_arg(arg_name, arg_type, arg_val, arg_desc)
 
         bpy.utils.register_class(GIDynamicOperator)
+        AutoGUI.operators[GIDynamicOperator.bl_idname] = GIDynamicOperator
         return GIDynamicOperator
 
 # ---------------------------------------------------------------------------
@@ -257,9 +385,8 @@ class GISceneLoadObject(bpy.types.Operator):
 
     def execute(self,context):
         print('LoadObject:', self.filepath)
-        obj = sg.load_object(self.filepath)
-        if obj != None:
-            send_object_to_blender(obj)
+        sg.load_object(self.filepath)
+        BlenderSync.flush()
         return {'FINISHED'}
 
     def invoke(self, context, event):
@@ -282,6 +409,10 @@ bpy.utils.register_class(GISceneMenu)
 
 class MenuMap:
     """ @brief Handles the menu hierarchy associated with a grob """
+
+    menus = {}      # menu id -> registered menu class
+    filled = set()  # paths of the menus whose items are created
+    pending = set() # paths of the menus whose items are being created
     def __init__(self, grob_meta_class : OGF.MetaClass):
         """
         @brief MenuMap constructor
@@ -293,21 +424,14 @@ class MenuMap:
         for command_class_name in commands_str.split(';'):
             # skipped, already in context menu
             if command_class_name != 'OGF::SceneGraphSceneCommands':
-                default_menu_name = command_class_name
-                mclass = gom.resolve_meta_type(command_class_name)
-                # Command may be associated with a base class, so we find
-	        # the name of this base class in the 'grob_class_name' attribute
-	        # of the Command and strip it to generate the menu name.
-                default_menu_name = default_menu_name.removeprefix(
-	            mclass.custom_attribute_value('grob_class_name')
-	        )
-                default_menu_name = default_menu_name.removesuffix('Commands')
-                for i in range(mclass.nb_slots()):
-                    mslot = mclass.ith_slot(i)
+                # menus and arguments are stored on disk by ReflectionCache,
+                # GOM reflection is only used the first time
+                default_menu_name, items = ReflectionCache.get_commands(
+                    command_class_name
+                )
+                for mclass_name, slot_name, submenu_name, help, args in items:
                     menu_name = default_menu_name
-                    if(mslot.has_custom_attribute('menu')):
-                       submenu_name = mslot.custom_attribute_value('menu')
-                       submenu_name.removesuffix('/')
+                    if submenu_name != None:
                        if submenu_name[0] == '/':
                           menu_name = submenu_name[1:]
                           # Comment for Graphite (not relevant here, but kept):
@@ -320,28 +444,27 @@ class MenuMap:
                              menu_name = 'menubar/'+menu_name
                        else:
                           menu_name = menu_name + '/' + submenu_name
-                    # Skip Object and Node functions, we don't want them to
-                    # appear in the GUI
-                    if (
-                        OGF.Object.find_member(mslot.name)==None
-                            and
-                        OGF.Node.find_member(mslot.name)  ==None
-                    ):
-                        self.insert(self.root, menu_name, mslot)
+                    # (Object and Node functions are already skipped)
+                    self.insert(
+                        self.root, menu_name,
+                        (mclass_name, slot_name, help, args)
+                    )
+        ReflectionCache.save()
 
     def insert(
             self,
             menu_dict : dict, menu_name : str,
-            mslot : OGF.MetaSlot
+            item : tuple
     ) :
         """
         @brief Inserts an entry in the menumap (used internally)
         @param[in] menu_dict a menu dictionary
         @param[in] menu_name the name of the menu to be inserted, with slashes
-        @param[in] mslot the meta-slot of the method corresponding to the menu
+        @param[in] item the name of the commands class, the name of the
+          method, the help string and the arguments of the menu item
         """
         if menu_name == '':
-            menu_dict[mslot.name] = mslot
+            menu_dict[item[1]] = item
         else:
             # get leading path component
             k = menu_name[0:(menu_name+'/').find('/')]
@@ -349,16 +472,29 @@ class MenuMap:
                 menu_dict[k] = dict()
             menu_name = menu_name.removeprefix(k)
             menu_name = menu_name.removeprefix('/')
-            self.insert(menu_dict[k], menu_name, mslot)
+            self.insert(menu_dict[k], menu_name, item)
 
 
     def create_menu_class(self, path : str = None, menudict : dict = None) :
+        """
+        @brief Creates and registers the Blender menu class of a menu
+        @details The classes of the submenus and the operators of the menu
+          items are created the first time the menu is drawn, together
+          with the items of its submenus, so that the add-on loads fast
+          whatever the size of the command set, and a submenu opened by
+          the user is already complete.
+        @param[in] path the path of the menu, with slashes
+        @param[in] menudict the menu dictionary
+        @return the menu class
+        """
         if path == None:
             path = 'Alloy'
 
         if menudict == None:
             menudict = self.root
 
+        menu_map = self
+
         # This is a locally defined class, creates a different class
         # at each invokation of this function ! (I love Python for that)
         class GIDynamicMenu(bpy.types.Menu):
@@ -372,32 +508,84 @@ class MenuMap:
                 layout = self.layout
                 if path == 'Alloy':
                     layout.menu(GISceneMenu.bl_idname)
+                complete = True
                 for k,v in self.menudict.items():
                     if isinstance(v,dict):
-                        layout.menu(AutoGUI.menu_id(path + '/' + k))
+                        idname = AutoGUI.menu_id(path + '/' + k)
+                        registered = idname in MenuMap.menus
+                        # items of submenus are created in advance
+                        if path + '/' + k not in MenuMap.filled:
+                            complete = False
+                    else:
+                        idname = AutoGUI.operator_id(v)
+                        registered = idname in AutoGUI.operators
+                    if not registered:
+                        # placeholder, until the class is registered
+                        layout.label(text = k.replace('_',' ') + '...')
+                        complete = False
+                    elif isinstance(v,dict):
+                        layout.menu(idname)
                     else:
-                        layout.operator(AutoGUI.operator_id(v))
+                        layout.operator(idname)
+                # Classes cannot be registered while drawing, it is
+                # done right after
+                if not complete and path not in MenuMap.pending:
+                    MenuMap.pending.add(path)
+                    bpy.app.timers.register(
+                        lambda: menu_map.fill_menu(path, menudict)
+                    )
 
             def draw_item(self, context):
                 layout = self.layout
                 layout.menu(GIDynamicMenu.bl_idname)
 
-        # Now we need to recursively create all the classes for the
-        # submenus and the referenced operators
+        bpy.utils.register_class(GIDynamicMenu)
+        MenuMap.menus[GIDynamicMenu.bl_idname] = GIDynamicMenu
+        return GIDynamicMenu
+
+    def create_menu_items(
+            self, path : str, menudict : dict, prefetch : bool = True
+    ) :
+        """
+        @brief Creates the classes of the submenus and the operators
+          of a menu, if not already done
+        @param[in] path the path of the menu, with slashes
+        @param[in] menudict the menu dictionary
+        @param[in] prefetch if True, the items of the submenus are
+          created as well (one level)
+        """
         for k,v in menudict.items():
             if isinstance(v,dict):
-                self.create_menu_class(path + '/' + k, v)
-            else:
+                if AutoGUI.menu_id(path + '/' + k) not in MenuMap.menus:
+                    self.create_menu_class(path + '/' + k, v)
+                if prefetch and path + '/' + k not in MenuMap.filled:
+                    self.create_menu_items(path + '/' + k, v, False)
+            elif AutoGUI.operator_id(v) not in AutoGUI.operators:
                 AutoGUI.create_operator_for_method(v)
+        MenuMap.filled.add(path)
 
-        bpy.utils.register_class(GIDynamicMenu)
-        return GIDynamicMenu
+    def fill_menu(self, path : str, menudict : dict) :
+        """
+        @brief Creates the items of a menu and of its submenus
+        @details Called by a timer after the menu was drawn incomplete
+        @param[in] path the path of the menu, with slashes
+        @param[in] menudict the menu dictionary
+        """
+        self.create_menu_items(path, menudict)
+        MenuMap.pending.discard(path)
+        # redraw so that the placeholders are replaced
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+        return None # do not call again (timer)
 
 
 # --------------------------------------------------------------------------
 
 mesh_grob_menu = MenuMap(OGF.MeshGrob)
 GIMeshGrobMenu = mesh_grob_menu.create_menu_class()
+# the root menu and its submenus are complete when first opened
+mesh_grob_menu.create_menu_items('Alloy', mesh_grob_menu.root)
 
 if __name__ == "__main__":
      bpy.types.TOPBAR_MT_editor_menus.append(GIMeshGrobMenu.draw_item)
@@ -1,11 +1,97 @@
 import typing
 import polyscope.imgui as imgui
 import gompy, gompy.gom as gom, gompy.types.OGF as OGF
+from reflection_cache import ReflectionCache
+
+#===============================================================================
+
+class EnvironmentCache:
+    """
+    @brief Stores the values of the GOM environment variables used by the GUI
+    @details Values are stored as lists, so that the GUI does not need to
+      query and split them at each frame. The whole cache is discarded
+      whenever the list of objects in the SceneGraph changes (objects
+      created, deleted or renamed) and whenever new commands are registered.
+    """
+    values = {}       # environment variable name -> list of values
+    connection = None
+
+    def watch(scene_graph: OGF.SceneGraph):
+        """
+        @brief Discards the cache whenever the list of objects changes
+        @param[in] scene_graph the SceneGraph
+        """
+        if EnvironmentCache.connection != None:
+            EnvironmentCache.connection.remove()
+        EnvironmentCache.connection = gom.connect(
+            scene_graph.values_changed, EnvironmentCache.clear
+        )
+        EnvironmentCache.clear()
+
+    def get(name: str) -> list:
+        """
+        @brief Gets the value of a GOM environment variable
+        @param[in] name the name of the environment variable, for instance
+          'grob_instances' or 'OGF::MeshGrob_instances'
+        @return the (cached) list of ';'-separated values, without the empty
+          ones (not to be modified)
+        """
+        values = EnvironmentCache.values.get(name, None)
+        if values == None:
+            values = [
+                value for value in gom.get_environment_value(name).split(';')
+                if value != ''
+            ]
+            EnvironmentCache.values[name] = values
+        return values
+
+    def clear(new_list: str = ''):
+        """
+        @brief Discards all the cached values
+        @param[in] new_list the list of objects, ignored (this function is
+          connected to SceneGraph.values_changed)
+        """
+        EnvironmentCache.values = {}
 
 #===============================================================================
 
 class MenuMap:
     """ @brief Handles the menu hierarchy associated with a grob """
+
+    cache = {} # meta-class name -> MenuMap
+
+    def get(grob_meta_class : OGF.MetaClass):
+        """
+        @brief Gets the MenuMap associated with a Graphite class
+        @details The MenuMap is constructed the first time the function is
+          called for a Grob class, then shared by all the objects of this
+          class. The cache is cleared when new commands are registered.
+        @param[in] grob_meta_class the GOM meta-class of a Graphite object
+        @return the MenuMap
+        """
+        menu_map = MenuMap.cache.get(grob_meta_class.name, None)
+        if menu_map == None:
+            menu_map = MenuMap(grob_meta_class)
+            MenuMap.cache[grob_meta_class.name] = menu_map
+        return menu_map
+
+    def precompute(grob_class_names: list = None):
+        """
+        @brief Constructs the MenuMaps of several Graphite classes
+        @details Avoids a delay the first time the context menu of an
+          object is opened
+        @param[in] grob_class_names the names of the Graphite classes, for
+          instance ['OGF::MeshGrob'], or None for all Graphite classes
+        """
+        if grob_class_names == None:
+            grob_class_names = EnvironmentCache.get('grob_types')
+        for grob_class_name in grob_class_names:
+            MenuMap.get(gom.resolve_meta_type(grob_class_name))
+
+    def clear_cache():
+        """ @brief Discards all the MenuMaps, used when commands changed """
+        MenuMap.cache = {}
+
     def __init__(self, grob_meta_class : OGF.MetaClass):
         """
         @brief MenuMap constructor
@@ -17,21 +103,12 @@ class MenuMap:
         for command_class_name in commands_str.split(';'):
             # skipped, already in context menu
             if command_class_name != 'OGF::SceneGraphSceneCommands':
-                default_menu_name = command_class_name
-                mclass = gom.resolve_meta_type(command_class_name)
-                # Command may be associated with a base class, so we find
-	        # the name of this base class in the 'grob_class_name' attribute
-	        # of the Command and strip it to generate the menu name.
-                default_menu_name = default_menu_name.removeprefix(
-	            mclass.custom_attribute_value('grob_class_name')
-	        )
-                default_menu_name = default_menu_name.removesuffix('Commands')
-                for i in range(mclass.nb_slots()):
-                    mslot = mclass.ith_slot(i)
+                default_menu_name, items = ReflectionCache.get_commands(
+                    command_class_name
+                )
+                for mclass_name, slot_name, submenu_name, help, _ in items:
                     menu_name = default_menu_name
-                    if(mslot.has_custom_attribute('menu')):
-                       submenu_name = mslot.custom_attribute_value('menu')
-                       submenu_name.removesuffix('/')
+                    if submenu_name != None:
                        if submenu_name[0] == '/':
                           menu_name = submenu_name[1:]
                           # Comment for Graphite (not relevant here, but kept):
@@ -44,14 +121,10 @@ class MenuMap:
                              menu_name = 'menubar/'+menu_name
                        else:
                           menu_name = menu_name + '/' + submenu_name
-                    # Skip Object and Node functions, we don't want them to
-                    # appear in the GUI
-                    if (
-                        OGF.Object.find_member(mslot.name)==None
-                            and
-                        OGF.Node.find_member(mslot.name)  ==None
-                    ):
-                        self.insert(self.root, menu_name, mslot)
+                    self.insert(
+                        self.root, menu_name, (mclass_name, slot_name, help)
+                    )
+        ReflectionCache.save()
 
     def draw_menus(
             self, o : OGF.Object, menudict : dict = None
@@ -73,28 +146,27 @@ class MenuMap:
                         result = submenu_result
                     imgui.EndMenu()
             else:
-                mslot = v
-                mclass = mslot.container_meta_class()
+                mclass_name, slot_name, help = v
                 if imgui.MenuItem(k.replace('_',' ')):
-                    result = getattr(o.query_interface(mclass.name),mslot.name)
-                if (imgui.IsItemHovered() and
-                    mslot.has_custom_attribute('help')):
-                    imgui.SetTooltip(mslot.custom_attribute_value('help'))
+                    result = getattr(o.query_interface(mclass_name),slot_name)
+                if imgui.IsItemHovered() and help != '':
+                    imgui.SetTooltip(help)
         return result
 
     def insert(
             self,
             menu_dict : dict, menu_name : str,
-            mslot : OGF.MetaSlot
+            item : tuple
     ) :
         """
         @brief Inserts an entry in the menumap (used internally)
         @param[in] menu_dict a menu dictionary
         @param[in] menu_name the name of the menu to be inserted, with slashes
-        @param[in] mslot the meta-slot of the method corresponding to the menu
+        @param[in] item the name of the commands class, the name of the
+          method and the help string of the menu item
         """
         if menu_name == '':
-            menu_dict[mslot.name] = mslot
+            menu_dict[item[1]] = item
         else:
             # get leading path component
             k = menu_name[0:(menu_name+'/').find('/')]
@@ -102,7 +174,7 @@ class MenuMap:
                 menu_dict[k] = dict()
             menu_name = menu_name.removeprefix(k)
             menu_name = menu_name.removeprefix('/')
-            self.insert(menu_dict[k], menu_name, mslot)
+            self.insert(menu_dict[k], menu_name, item)
 
 
 class ArgList(dict):
@@ -450,7 +522,7 @@ class AutoGUI:
         @param[in] property_name the name of the property to be edited
         @param[in] an optional tooltip to be displayed
         """
-        values = gom.get_environment_value('grob_instances')
+        values = EnvironmentCache.get('grob_instances')
         AutoGUI.combo_box_handler(o, property_name, values, tooltip)
 
     def OGF__MeshGrobName_handler(
@@ -464,7 +536,7 @@ class AutoGUI:
         @param[in] property_name the name of the property to be edited
         @param[in] an optional tooltip to be displayed
         """
-        values = gom.get_environment_value('OGF::MeshGrob_instances')
+        values = EnvironmentCache.get('OGF::MeshGrob_instances')
         AutoGUI.combo_box_handler(o, property_name, values, tooltip)
 
     def OGF__NewMeshGrobName_handler(
@@ -478,7 +550,7 @@ class AutoGUI:
         @param[in] property_name the name of the property to be edited
         @param[in] an optional tooltip to be displayed
         """
-        values = gom.get_environment_value('OGF::MeshGrob_instances')
+        values = EnvironmentCache.get('OGF::MeshGrob_instances')
         AutoGUI.editable_combo_box_handler(o, property_name, values, tooltip)
 
     def OGF__VoxelGrobName_handler(
@@ -492,7 +564,7 @@ class AutoGUI:
         @param[in] property_name the name of the property to be edited
         @param[in] an optional tooltip to be displayed
         """
-        values = gom.get_environment_value('OGF::VoxelGrob_instances')
+        values = EnvironmentCache.get('OGF::VoxelGrob_instances')
         AutoGUI.combo_box_handler(o, property_name, values, tooltip)
 
     def OGF__GrobClassName_handler(
@@ -506,7 +578,7 @@ class AutoGUI:
         @param[in] property_name the name of the property to be edited
         @param[in] an optional tooltip to be displayed
         """
-        values = gom.get_environment_value('grob_types')
+        values = EnvironmentCache.get('grob_types')
         AutoGUI.combo_box_handler(o, property_name, values, tooltip)
 
     def enum_handler(
@@ -536,7 +608,7 @@ class AutoGUI:
         @brief Handles the GUI for a property in an object, using a combobox
         @param[in,out] o the object
         @param[in] property_name the name of the property to be edited
-        @param[in] values a ';'-separated string with all enum values
+        @param[in] values a list or a ';'-separated string with all values
         @param[in] an optional tooltip to be displayed
         """
         AutoGUI.label(property_name, tooltip)
@@ -558,7 +630,7 @@ class AutoGUI:
                using a editable combobox
         @param[in,out] o the object
         @param[in] property_name the name of the property to be edited
-        @param[in] values a ';'-separated string with all enum values
+        @param[in] values a list or a ';'-separated string with all values
         @param[in] an optional tooltip to be displayed
         """
         AutoGUI.label(property_name, tooltip)
@@ -576,7 +648,9 @@ class AutoGUI:
             imgui.OpenPopup('##properties##popup_'+property_name)
 
         if imgui.BeginPopup('##properties##popup_'+property_name):
-            for val in values.split(';'):
+            if isinstance(values, str):
+                values = values.split(';')
+            for val in values:
                 if imgui.Selectable(val):
                     setattr(o,property_name,val)
             imgui.EndPopup()
@@ -585,15 +659,18 @@ class AutoGUI:
         """
         @brief Draws and handles the GUI for a combo-box
         @param[in] label the ImGui label of te combo-box
-        @param[in] values a ';'-separated string with all values
+        @param[in] values a list or a ';'-separated string with all values
         @param[in] old_value the previous value of the combo-box
         @return selected flag and new value of the combo-box
         """
-        if values=='':
-            return false,-1
-        if values[0] == ';':
-            values = values[1:]
-        values = values.split(';')
+        if isinstance(values, str):
+            if values=='':
+                return False,-1
+            if values[0] == ';':
+                values = values[1:]
+            values = values.split(';')
+        if len(values) == 0:
+            return False,-1
 
         found = True
         try:
@@ -676,7 +753,10 @@ class PyAutoGUI:
             ):
                 pyfunc = getattr(methodsclass,method_name)
                 mslot = PyAutoGUI.register_command(mclass, pyfunc)
+        ReflectionCache.python_commands.add(mclass.name)
         scene_graph.register_grob_commands(grobclass,mclass)
+        EnvironmentCache.clear()
+        MenuMap.clear_cache()
         return mclass
 
     def register_command(mclass: OGF.MetaClass, pyfunc: callable):
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+# Benchmarks for the numpy implementations in PyGraphite
+# Usage: python3 benchmarks.py [benchmark names ...]
+#  (runs all benchmarks if no name is specified)
+
+import sys, os, time, tracemalloc, tempfile
+import numpy as np
+import polyscope as ps # imported before gompy
+import gompy.types.OGF as OGF
+
+from mesh_grob_ops import MeshGrobOps
+from polyscope_views import SceneGraphView
+from auto_gui import MenuMap, ReflectionCache
+from graphite_app import GraphiteApp
+
+#=====================================================
+
+def timed(func: callable, *args) -> tuple:
+    """
+    @brief Calls a function and measures its wall time
+    @param[in] func the function
+    @param[in] args the arguments of the function
+    @return the elapsed time in seconds and the result of the function
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def timed_with_memory(func: callable, *args) -> tuple:
+    """
+    @brief Calls a function and measures its wall time and peak memory
+    @details Memory is measured with tracemalloc, that sees numpy allocations
+    @param[in] func the function
+    @param[in] args the arguments of the function
+    @return the elapsed time in seconds and the peak of memory allocated by
+      the function in bytes
+    """
+    tracemalloc.start()
+    elapsed,_ = timed(func, *args)
+    _,peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def create_sphere(name: str, n: int) -> OGF.MeshGrob:
+    """
+    @brief Creates a UV sphere
+    @param[in] name the name of the object
+    @param[in] n number of subdivisions in each direction
+    @return the created MeshGrob
+    """
+    S = OGF.MeshGrob(name)
+    MeshGrobOps.set_parametric_surface(
+        S,
+        lambda U,V: (np.cos(U)*np.cos(V),np.sin(U)*np.cos(V),np.sin(V)),
+        n, n,
+        0.0, 2.0*np.pi,
+        -0.5*np.pi, 0.5*np.pi
+    )
+    return S
+
+def init_polyscope():
+    """
+    @brief Initializes PolyScope with the mock backend (no window)
+    """
+    global polyscope_initialized
+    if not polyscope_initialized:
+        ps.init('openGL_mock')
+        polyscope_initialized = True
+
+polyscope_initialized = False
+
+#=====================================================
+
+def bench_tubes():
+    """
+    @brief Compares the creation of tubes with one Graphite call per
+      cylinder/sphere and with MeshGrobOps.create_tubes()
+    """
+    S = create_sphere('S', 50)
+    points = np.asarray(S.I.Editor.get_points())[:,0:3]
+    edges,_,_,_ = MeshGrobOps.get_object_edges(S) # same as mesh_as_tubes
+    cyl_radius = 0.002
+    sph_radius = 0.003
+
+    def loop():
+        tubes = OGF.MeshGrob('tubes_loop')
+        tubes.disable_signals()
+        for p1,p2 in zip(points[edges[:,0]], points[edges[:,1]]):
+            tubes.I.Shapes.create_cylinder_from_extremities(
+                p1, p2, cyl_radius, 10
+            )
+        for p in points:
+            tubes.I.Shapes.create_sphere(p, sph_radius, 2)
+        tubes.enable_signals()
+        tubes.update()
+        return tubes
+
+    def vectorized():
+        tubes = OGF.MeshGrob('tubes_numpy')
+        vrtx,T = MeshGrobOps.create_tubes(
+            points, edges, cyl_radius, sph_radius, 10, 2
+        )
+        MeshGrobOps.set_triangle_mesh(tubes, vrtx, T)
+        return tubes
+
+    t_loop, tubes_loop = timed(loop)
+    t_numpy, tubes_numpy = timed(vectorized)
+    print('tubes:', edges.shape[0], 'edges,', points.shape[0], 'vertices')
+    print('   loop : {:8.3f}s {} facets'.format(
+        t_loop, tubes_loop.I.Editor.nb_facets
+    ))
+    print('   numpy: {:8.3f}s {} facets'.format(
+        t_numpy, tubes_numpy.I.Editor.nb_facets
+    ))
+    print('   speedup: {:.1f}x'.format(t_loop/t_numpy))
+
+def bench_transform(nb_vertices: int = 10000000):
+    """
+    @brief Compares MeshGrobOps.transform_object() with the previous
+      implementation that used homogeneous coordinates for all vertices
+    @param[in] nb_vertices number of vertices of the transformed mesh
+    """
+    def reference(o, xform):
+        object_vertices = np.asarray(o.I.Editor.get_points())
+        vertices = np.c_[object_vertices, np.ones(object_vertices.shape[0])]
+        vertices = np.matmul(vertices,np.transpose(xform))
+        vertices = vertices[:,:-1] / vertices[:,-1][:,np.newaxis]
+        np.copyto(object_vertices,vertices)
+
+    P = OGF.MeshGrob('P')
+    MeshGrobOps.set_triangle_mesh(
+        P, np.random.rand(nb_vertices,3), np.empty((0,3),dtype=np.uint32)
+    )
+    affine = np.array(
+        [[0.0,-1.0, 0.0, 1.0],
+         [1.0, 0.0, 0.0, 2.0],
+         [0.0, 0.0, 2.0, 3.0],
+         [0.0, 0.0, 0.0, 1.0]]
+    )
+    projective = np.copy(affine)
+    projective[3] = [0.0, 0.0, 0.1, 1.0]
+    print('transform:', nb_vertices, 'vertices')
+    for name, xform in (('affine', affine), ('projective', projective)):
+        for impl_name, impl in (
+                ('reference', reference),
+                ('in-place ', MeshGrobOps.transform_object)
+        ):
+            elapsed, peak = timed_with_memory(impl, P, xform)
+            print('   {} {}: {:8.3f}s {:8.1f} MB peak, {:6.1f} Mpts/s'.format(
+                name.ljust(10), impl_name, elapsed, peak / 1e6,
+                nb_vertices / elapsed / 1e6
+            ))
+
+def bench_scene(nb_objects: int = 10000):
+    """
+    @brief Measures SceneGraphView.update_objects() on a scene with many
+      small objects, as in assemblies with thousands of parts
+    @param[in] nb_objects number of objects in the scene
+    """
+    init_polyscope()
+    vertices = np.array(
+        [[0.0,0.0,0.0],[1.0,0.0,0.0],[0.0,1.0,0.0],[0.0,0.0,1.0]]
+    )
+    triangles = np.array(
+        [[0,2,1],[0,1,3],[1,2,3],[0,3,2]], dtype=np.uint32
+    )
+    names = [ 'part_' + str(i) for i in range(nb_objects) ]
+    scene_graph = None
+    for i,name in enumerate(names):
+        o = OGF.MeshGrob(name)
+        if scene_graph == None:
+            scene_graph = o.scene_graph()
+            scene_graph.disable_signals()
+        MeshGrobOps.set_triangle_mesh(o, vertices + i, triangles)
+    scene_graph.enable_signals()
+
+    view = SceneGraphView(scene_graph)
+    removed = set(names[::100])
+    print('scene:', nb_objects, 'objects')
+    for label, new_list in (
+            ('create all views ', names),
+            ('unchanged list   ', names),
+            ('remove 1% objects', [n for n in names if n not in removed]),
+            ('add 1% objects   ', names)
+    ):
+        elapsed,_ = timed(view.update_objects, ';'.join(new_list))
+        print('   {}: {:8.3f}s'.format(label, elapsed))
+    ps.remove_all_structures()
+
+def bench_menus():
+    """
+    @brief Compares the construction of the menus of all Graphite classes
+      with GOM reflection (cold start) and with the file saved by
+      ReflectionCache (warm start)
+    """
+    old_filename = ReflectionCache.filename
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ReflectionCache.filename = os.path.join(tmpdir, 'commands.json')
+        ReflectionCache.clear()
+        MenuMap.clear_cache()
+        t_cold,_ = timed(MenuMap.precompute)
+        ReflectionCache.commands = None # forces reloading the file
+        MenuMap.clear_cache()
+        t_warm,_ = timed(MenuMap.precompute)
+        size = os.path.getsize(ReflectionCache.filename)
+        nb_classes = len(MenuMap.cache)
+    ReflectionCache.filename = old_filename
+    ReflectionCache.commands = None
+    MenuMap.clear_cache()
+    print('menus:', nb_classes, 'classes,', size, 'bytes')
+    print('   cold (reflection): {:8.3f}s'.format(t_cold))
+    print('   warm (file)      : {:8.3f}s'.format(t_warm))
+
+def bench_terminal(nb_lines: int = 1000):
+    """
+    @brief Compares printing messages in the terminal with a redraw for
+      each message and with redraws throttled by Terminal.flush()
+    @param[in] nb_lines number of printed lines
+    """
+    init_polyscope()
+    app = GraphiteApp()
+    app.terminal.set_sys_output() # keep print() in the console
+    ps.set_open_imgui_window_for_user_callback(False)
+    ps.set_user_callback(app.draw_GUI)
+    app.running = True
+    print('terminal:', nb_lines, 'lines')
+    for name, max_redraws in (
+            ('unthrottled', float('inf')),
+            ('throttled  ', 10)
+    ):
+        app.terminal.max_redraws_per_second = max_redraws
+        def verbose_command():
+            for i in range(nb_lines):
+                app.terminal.out_CB('line ' + str(i) + '\n')
+        elapsed,_ = timed(verbose_command)
+        print('   {}: {:8.3f}s'.format(name, elapsed))
+    app.running = False
+    ps.clear_user_callback()
+
+#=====================================================
+
+benchmarks = {
+    'tubes'     : bench_tubes,
+    'transform' : bench_transform,
+    'scene'     : bench_scene,
+    'menus'     : bench_menus,
+    'terminal'  : bench_terminal
+}
+
+if __name__ == '__main__':
+    scene_graph = OGF.SceneGraph()
+    names = sys.argv[1:] if len(sys.argv) > 1 else benchmarks.keys()
+    for name in names:
+        benchmarks[name]()
+        scene_graph.clear()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+
+# Records the commands invoked in PyGraphite, with their timings, in an
+# append-only log (one JSON record per line), and exports them as a Python
+# script that replays the session without GUI.
+#
+# Usage (exports the last session of a log):
+#   python3 command_history.py [history.jsonl] replay.py
+# then:
+#   python3 replay.py
+
+import sys, os, time, json, threading, platform
+
+try:
+    import resource # not available under Windows
+except ImportError:
+    resource = None
+
+#=====================================================
+
+def peak_rss() -> int:
+    """
+    @brief Gets the peak resident set size of the process
+    @return the peak RSS in bytes, or 0 if it cannot be measured
+    """
+    if resource == None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # in kilobytes under Linux, in bytes under macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+def mesh_counts(grob) -> dict:
+    """
+    @brief Gets the number of elements of a Graphite object
+    @param[in] grob the Graphite object
+    @return a dictionary with the number of vertices, facets and cells if
+      grob is a MeshGrob, None otherwise
+    """
+    if grob.meta_class.name != 'OGF::MeshGrob':
+        return None
+    E = grob.I.Editor
+    return {
+        'vertices': E.nb_vertices, 'facets': E.nb_facets, 'cells': E.nb_cells
+    }
+
+#=====================================================
+
+class CommandHistory:
+    """
+    @brief Records the commands invoked in PyGraphite
+    @details Each session starts with a 'session' record, with the
+      identifier of the gompy build, then has one 'command' record per
+      command and one 'load' record per loaded file. Records are appended
+      to the log file as soon as they are created.
+    """
+    default_filename = os.path.join(
+        os.path.expanduser('~'), '.cache', 'pygraphite', 'history.jsonl'
+    )
+    max_log_size = 10 * 1024 * 1024 # larger logs are rotated at startup
+
+    def __init__(self, filename: str = None):
+        """
+        @brief CommandHistory constructor
+        @param[in] filename the log file, or None to keep the records in
+          memory only
+        """
+        self.filename = filename
+        self.records = [] # records of the current session
+        self.lock = threading.Lock() # commands may run in a worker thread
+        self.rotate()
+        # not needed to export scripts, the build key is computed once
+        # and shared with the menus cache
+        from reflection_cache import ReflectionCache
+        self.append({
+            'type': 'session',
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'gompy_build': ReflectionCache.build_key(),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        })
+
+    def rotate(self):
+        """
+        @brief Renames the log file with a '.1' suffix if it is larger than
+          max_log_size, so that a new log is started
+        @details The previous '.1' file, if any, is discarded
+        """
+        if self.filename == None:
+            return
+        try:
+            if os.path.getsize(self.filename) > CommandHistory.max_log_size:
+                os.replace(self.filename, self.filename + '.1')
+        except OSError: # no log yet
+            pass
+
+    def append(self, record: dict):
+        """
+        @brief Appends a record to the history and to the log file
+        @param[in] record the record, a JSON-serializable dictionary
+        """
+        with self.lock:
+            self.records.append(record)
+            if self.filename == None:
+                return
+            try:
+                os.makedirs(
+                    os.path.dirname(os.path.abspath(self.filename)),
+                    exist_ok=True
+                )
+                with open(self.filename, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+            except OSError as e:
+                print('Warning: could not write ', self.filename, e)
+
+    def run(self, request, args: dict, grob):
+        """
+        @brief Executes a command and records it
+        @param[in] request the Request to be executed
+        @param[in] args the arguments of the request
+        @param[in] grob the target object of the request
+        """
+        # interface is None for commands directly called on the object
+        interface = request.object().meta_class.name
+        if interface == grob.meta_class.name:
+            interface = None
+        record = {
+            'type': 'command',
+            'object': None if grob.meta_class.name == 'OGF::SceneGraph'
+                      else grob.name,
+            'interface': interface,
+            'method': request.method().name,
+            'args': dict(args),
+            'counts_before': mesh_counts(grob),
+            'status': 'OK'
+        }
+        rss = peak_rss()
+        start = time.perf_counter()
+        try:
+            request(**args)
+        except Exception as e:
+            record['status'] = 'FAILED: ' + str(e)
+            raise
+        finally:
+            record['time'] = time.perf_counter() - start
+            record['peak_rss_delta'] = peak_rss() - rss
+            record['counts_after'] = mesh_counts(grob)
+            self.append(record)
+
+    def record_load(self, filename: str):
+        """
+        @brief Records a file loaded in the SceneGraph
+        @param[in] filename the name of the file
+        """
+        self.append({'type': 'load', 'filename': os.path.abspath(filename)})
+
+    def export_script(self, filename: str):
+        """
+        @brief Writes a Python script that replays the current session
+        @param[in] filename the name of the script
+        """
+        with self.lock:
+            records = list(self.records)
+        write_replay_script(records, filename)
+
+#=====================================================
+
+def read_log(filename: str) -> list:
+    """
+    @brief Reads a log written by CommandHistory
+    @param[in] filename the log file
+    @return a list of sessions, each session is a list of records
+    """
+    sessions = []
+    with open(filename) as f:
+        for line in f:
+            if line.strip() == '':
+                continue
+            record = json.loads(line)
+            if record['type'] == 'session' or len(sessions) == 0:
+                sessions.append([])
+            sessions[-1].append(record)
+    return sessions
+
+def write_replay_script(records: list, filename: str):
+    """
+    @brief Writes a Python script that replays a session
+    @details The script prints the time of each command and the time
+      recorded in the session, to compare gompy builds
+    @param[in] records the records of the session
+    @param[in] filename the name of the script
+    """
+    session = records[0] if records[0]['type'] == 'session' else {}
+    with open(filename, 'w') as f:
+        f.write(REPLAY_HEADER.format(
+            date = session.get('date','?'),
+            build = session.get('gompy_build','?'),
+            pygraphite_dir = os.path.dirname(os.path.abspath(__file__))
+        ))
+        for record in records:
+            if record['type'] == 'load':
+                f.write('load({!r})\n'.format(record['filename']))
+            elif record['type'] == 'command':
+                args = ''.join(
+                    ', {}={!r}'.format(k,v) for k,v in record['args'].items()
+                )
+                f.write('replay({!r}, {!r}, {!r}, {!r}{})\n'.format(
+                    record['object'], record['interface'], record['method'],
+                    record['time'], args
+                ))
+        f.write(REPLAY_FOOTER)
+
+REPLAY_HEADER = '''#!/usr/bin/env python
+
+# Replays a PyGraphite session recorded on {date}
+# gompy build: {build}
+# Usage: python3 replay.py
+
+import sys, time
+sys.path.append({pygraphite_dir!r})
+from auto_gui import PyAutoGUI # imports polyscope before gompy
+import gompy.types.OGF as OGF
+from mesh_grob_commands import MeshGrobPyGraphiteCommands
+
+scene_graph = OGF.SceneGraph()
+PyAutoGUI.register_commands(
+    scene_graph, OGF.MeshGrob, MeshGrobPyGraphiteCommands
+)
+
+# Python commands of the SceneGraph, implemented by the GUI
+scene_graph_commands = {{
+    'create_object': lambda type, name: scene_graph.create_object(type, name),
+    'clear_scenegraph': lambda: scene_graph.clear()
+}}
+
+total_time = 0.0
+recorded_total_time = 0.0
+
+def load(filename):
+    scene_graph.load_object(filename)
+
+def replay(objname, interface, method, recorded_time, **args):
+    global total_time, recorded_total_time
+    if interface == 'OGF::SceneGraphGraphiteCommands':
+        command = scene_graph_commands.get(method, None)
+    else:
+        target = (
+            scene_graph if objname == None
+            else getattr(scene_graph.objects, objname, None)
+        )
+        if target != None and interface != None:
+            target = target.query_interface(interface)
+        command = None if target == None else getattr(target, method)
+    if command == None:
+        print('skipped (not available in batch mode):', method)
+        return
+    start = time.perf_counter()
+    command(**args)
+    elapsed = time.perf_counter() - start
+    total_time = total_time + elapsed
+    recorded_total_time = recorded_total_time + recorded_time
+    print('{{:8.3f}}s (recorded {{:8.3f}}s) {{}}'.format(
+        elapsed, recorded_time, method
+    ))
+
+'''
+
+REPLAY_FOOTER = '''
+print('{:8.3f}s (recorded {:8.3f}s) total'.format(
+    total_time, recorded_total_time
+))
+'''
+
+#=====================================================
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2,3):
+        print('usage: python3 command_history.py [history.jsonl] replay.py')
+        sys.exit(1)
+    log = CommandHistory.default_filename
+    if len(sys.argv) == 3:
+        log = sys.argv[1]
+    sessions = [ s for s in read_log(log) if len(s) > 1 ]
+    if len(sessions) == 0:
+        print('no command recorded in', log)
+        sys.exit(1)
+    write_replay_script(sessions[-1], sys.argv[-1])
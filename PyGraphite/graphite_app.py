@@ -1,11 +1,13 @@
 import polyscope as ps, polyscope.imgui as imgui, numpy as np
-import time
+import time, threading, queue
 import gompy.gom as gom, gompy.types.OGF as OGF
 
-from auto_gui import MenuMap, ArgList, AutoGUI, PyAutoGUI
-from polyscope_views import SceneGraphView
+from auto_gui import MenuMap, ArgList, AutoGUI, PyAutoGUI, EnvironmentCache
+from polyscope_views import SceneGraphView, MeshGrobView
 from mesh_grob_ops import MeshGrobOps
 from terminal import Terminal
+from profiler import Profiler
+from command_history import CommandHistory
 from rlcompleter import Completer
 import imgui_ext
 
@@ -17,10 +19,11 @@ class GraphiteApp:
     #===== Application logic, callbacks ========================================
 
     def redraw(self):
-        if self.drawing:
+        if self.drawing or not self.in_main_thread():
             return
         self.drawing = True
-        ps.frame_tick()
+        with Profiler.scope('frame_tick', 'frame'):
+            ps.frame_tick()
         self.drawing = False
 
     def progress_begin_CB(self,taskname:str):
@@ -32,6 +35,9 @@ class GraphiteApp:
           only, (normally) there can't be nested PolyScope frames.
         @param[in] taskname the name of the task in the progress bar
         """
+        if not self.in_main_thread():
+            self.post_to_main_thread(self.progress_begin_CB, taskname)
+            return
         self.progress_task = taskname
         self.progress_percent = 0
         if self.running:
@@ -46,9 +52,14 @@ class GraphiteApp:
           only, (normally) there can't be nested PolyScope frames.
         @param[in] progress_percent percentage of progression
         """
+        if not self.in_main_thread():
+            self.post_to_main_thread(self.progress_CB, progress_percent)
+            return
         self.progress_percent = progress_percent
         if self.running:
             self.redraw()
+            if self.terminal.flush_pending: # messages skipped by throttling
+                self.terminal.flush()
 
     def progress_end_CB(self):
         """
@@ -58,10 +69,119 @@ class GraphiteApp:
           of a PolyScope frame, and since messages are triggered by commands
           only, (normally) there can't be nested PolyScope frames.
         """
+        if not self.in_main_thread():
+            self.post_to_main_thread(self.progress_end_CB)
+            return
         self.progress_task = None
         if self.running:
             self.redraw()
 
+    def scene_objects_changed_CB(self, new_list: str):
+        """
+        @brief Called whenever the list of Graphite objects changed
+        @details Invalidates the list of objects cached by
+          draw_scenegraph_GUI()
+        @param[in] new_list the new list of objects as a ';'-separated string
+        """
+        self.scene_objects = None
+
+    def in_main_thread(self) -> bool:
+        """
+        @brief Tests whether the caller runs in the main thread
+        @details Only the main thread is allowed to draw and to
+          modify PolyScope structures.
+        """
+        return threading.current_thread() is threading.main_thread()
+
+    def post_to_main_thread(self, func: callable, *args):
+        """
+        @brief Queues a function call to be executed by the main thread
+        @details Used by callbacks triggered by commands running in a worker
+          thread. Queued calls are executed by handle_posted_calls().
+        @param[in] func the function to be called
+        @param[in] args the arguments of the function
+        """
+        self.posted_calls.put((func, args))
+        self.request_frames()
+
+    def request_frames(self, duration: float = 0.0):
+        """
+        @brief Wakes up the main loop if it is idle
+        @details Can be called from any thread
+        @param[in] duration the main loop draws frames at full rate during
+          at least this duration, in seconds (for instance for animations)
+        """
+        self.active_until = max(
+            self.active_until, time.perf_counter() + duration
+        )
+        self.wakeup.set()
+
+    def is_active(self) -> bool:
+        """
+        @brief Tests whether something happened during the last frame
+        @details Used by the main loop to decide whether it can wait before
+          drawing the next frame
+        @retval True if the user interacted with the GUI or if something
+          needs to be displayed (messages, progress, updated objects)
+        @retval False otherwise
+        """
+        io = imgui.GetIO()
+        # Only actual events are tested, not focus state (a text field
+        # keeps the focus after a command, the loop should still idle)
+        keys_down = tuple(imgui.IsKeyDown(key) for key in self.watched_keys)
+        keys_changed = (keys_down != self.keys_down)
+        self.keys_down = keys_down
+        return (
+            io.MouseDown[0] or io.MouseDown[1] or io.MouseDown[2] or
+            io.MouseDelta[0] != 0.0 or io.MouseDelta[1] != 0.0 or
+            io.MouseWheel != 0.0 or
+            keys_changed or True in keys_down or # changed or held (repeat)
+            self.terminal.update_frames > 0 or
+            self.terminal.queued_execute_command or
+            self.queued_execute_command or
+            self.progress_task != None or
+            len(self.scene_graph_view.dirty_views) != 0 or
+            self.scene_graph_view.highlighted != None
+        )
+
+    def update_loop_stats(self, idle_wait: float, active: bool):
+        """
+        @brief Updates the statistics of the main loop, displayed in the
+          Windows menu
+        @details Measures, for each period of one second, the number of
+          frames, the CPU usage of the process and the input latency, that
+          is the longest wait before a frame where the user interacted with
+          the GUI (an upper bound of the delay between an event and the
+          frame that handles it).
+        @param[in] idle_wait the time waited before the last frame
+        @param[in] active whether the user interacted during the last frame
+        """
+        stats = self.loop_stats
+        stats['frames'] = stats['frames'] + 1
+        if active:
+            stats['latency'] = max(stats['latency'], idle_wait)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if wall - stats['wall'] >= 1.0:
+            stats['fps'] = stats['frames'] / (wall - stats['wall'])
+            stats['cpu_usage'] = (cpu - stats['cpu']) / (wall - stats['wall'])
+            stats['input_latency'] = stats['latency']
+            stats['frames'] = 0
+            stats['latency'] = 0.0
+            stats['wall'] = wall
+            stats['cpu'] = cpu
+
+    def handle_posted_calls(self):
+        """
+        @brief Executes the function calls queued by post_to_main_thread()
+        """
+        while True:
+            try:
+                func, args = self.posted_calls.get_nowait()
+            except queue.Empty:
+                return
+            func(*args)
+
     # ============= constructor ==========================================
 
     def __init__(self):
@@ -73,11 +193,51 @@ class GraphiteApp:
 
         self.running = False
 
-        self.menu_maps = {}
+        # If set, the menus of all Graphite classes are constructed at
+        # startup rather than the first time they are opened
+        self.precompute_menus = False
+
+        # If set, invoked commands are appended to the history log
+        # (CommandHistory.default_filename), else they are only kept in
+        # memory for 'Export history...'
+        self.record_history = True
         self.reset_command()
         self.queued_execute_command = False # command execution is queued, for
         self.queued_close_command   = False # making it happen out off ps CB
 
+        # Background execution of commands (opt-in). Callbacks triggered
+        # from the worker thread are sent to the main thread through a
+        # thread-safe queue.
+        self.background_commands = False
+        self.worker = None
+        self.posted_calls = queue.Queue()
+
+        # Main loop scheduling: frames are drawn at full rate while something
+        # happens, then the loop waits, longer and longer up to max_idle_wait,
+        # or until request_frames() is called.
+        self.wakeup = threading.Event()
+        self.active_until = 0.0
+        self.active_period = 0.5   # full rate after last event (seconds)
+        self.min_idle_wait = 0.01  # wait between frames at full rate
+        self.max_idle_wait = 0.1   # longest wait when idle (input latency)
+        # Keys watched by is_active() (typing changes their state)
+        self.watched_keys = [
+            getattr(imgui, 'ImGuiKey_' + name) for name in (
+                [ chr(c) for c in range(ord('A'), ord('Z')+1) ] +
+                [ str(d) for d in range(10) ] + [
+                    'Tab', 'LeftArrow', 'RightArrow', 'UpArrow', 'DownArrow',
+                    'Enter', 'Backspace', 'Delete', 'Escape', 'Space',
+                    'Home', 'End', 'PageUp', 'PageDown', 'Minus', 'Period',
+                    'LeftShift', 'RightShift', 'LeftCtrl', 'RightCtrl'
+                ]
+            ) if hasattr(imgui, 'ImGuiKey_' + name)
+        ]
+        self.keys_down = ()
+        self.loop_stats = {
+            'fps': 0.0, 'cpu_usage': 0.0, 'input_latency': 0.0,
+            'frames': 0, 'latency': 0.0, 'wall': 0.0, 'cpu': 0.0
+        }
+
         self.scene_graph = OGF.SceneGraph()
 
         # create a Graphite ApplicationBase. It has the printing and
@@ -99,6 +259,11 @@ class GraphiteApp:
         # scene graph edition
         self.rename_old = None
         self.rename_new = None
+        self.scene_objects = None # cached children of the scene graph
+        gom.connect(
+            self.scene_graph.values_changed, self.scene_objects_changed_CB
+        )
+        EnvironmentCache.watch(self.scene_graph)
 
         # Views
         self.scene_graph_view = SceneGraphView(self.scene_graph)
@@ -108,6 +273,11 @@ class GraphiteApp:
         self.scene_file_to_save = ''
         self.object_file_to_save = ''
         self.object_to_save = None
+        self.history_file_to_save = ''
+
+        # Log of all invoked commands, that can be replayed, created
+        # by run() (depends on self.record_history)
+        self.history = None
 
         # Draw
         self.drawing = False
@@ -124,13 +294,21 @@ class GraphiteApp:
             self.scene_graph, OGF.SceneGraph, SceneGraphGraphiteCommands
         )
 
+        if self.precompute_menus:
+            MenuMap.precompute()
+
+        self.history = CommandHistory(
+            CommandHistory.default_filename if self.record_history else None
+        )
+
         for f in args[1:]:
             self.scene_graph.load_object(f)
+            self.history.record_load(f)
 
         ps.set_open_imgui_window_for_user_callback(False) # we draw our own win
         ps.set_user_callback(self.draw_GUI)
         self.running = True
-        quiet_frames = 0
+        idle_wait = self.min_idle_wait
         self.scene_graph.application.start()
 
         while self.running:
@@ -143,39 +321,49 @@ class GraphiteApp:
             # can redraw GUI by calling frame tick again.
             self.handle_queued_command()
 
-            # Mechanism to make it sleep a little bit
-            # if no mouse click/mouse drag happened
-            # since 2000 frames or more. This leaves
-            # CPU power for other apps and/or lets the
-            # CPU cool down. There are two levels of
-            # cooling down depending on how many frames
-            # were "quiet" (that is, without mouse click
-            # or mouse drag)
-            if (
-                    imgui.GetIO().MouseDown[0] or
-                    imgui.GetIO().MouseDown[1] or
-                    imgui.GetIO().MouseDown[2] or
-                    imgui.IsKeyPressed(imgui.ImGuiKey_Tab) or
-                    imgui.IsKeyPressed(imgui.ImGuiKey_UpArrow) or
-                    imgui.IsKeyPressed(imgui.ImGuiKey_DownArrow) or
-                    imgui.IsKeyPressed(imgui.ImGuiKey_RightArrow) or
-                    imgui.IsKeyPressed(imgui.ImGuiKey_LeftArrow)
-            ):
-                quiet_frames = 0
-            else:
-                quiet_frames = quiet_frames + 1
-            if quiet_frames > 2200:
-                time.sleep(0.5)  # gros dodo: 1/2 second
-                                 # (after 2000 + 200*1/20th second)
-            elif quiet_frames > 2000:
-                time.sleep(0.05) # petit dodo: 1/20th second
+            # Handle progress and messages sent by background commands
+            self.handle_posted_calls()
+
+            # Whether the next frame is needed soon (see below)
+            active = self.is_active()
+
+            # Update the views of the objects that changed, at most once
+            # per frame even if they received several signals.
+            with Profiler.scope('update_dirty_views', 'frame'):
+                self.scene_graph_view.update_dirty_views()
+            Profiler.end_frame()
+
+            # Draw frames at full rate while the user interacts or while
+            # something needs to be displayed, then wait longer and longer
+            # between frames. Frames are also needed to poll input events,
+            # this bounds the waiting time (and input latency) to
+            # max_idle_wait. Messages, progress and commands running in
+            # background wake up the loop with request_frames().
+            if active:
+                self.active_until = max(
+                    self.active_until, time.perf_counter() + self.active_period
+                )
+            if time.perf_counter() < self.active_until:
+                next_wait = self.min_idle_wait
             else:
-                time.sleep(0.01) # micro-sieste: 1/100th second
+                next_wait = min(2.0 * idle_wait, self.max_idle_wait)
+            self.update_loop_stats(idle_wait, active)
+            idle_wait = next_wait
+            self.wakeup.wait(idle_wait)
+            self.wakeup.clear()
+        if self.worker != None:
+            self.worker.join()
+        self.handle_posted_calls()
         self.scene_graph.clear()
         self.scene_graph.application.stop()
 
     def draw_GUI(self):
         """ @brief Draws Graphite GUI """
+        with Profiler.scope('draw_GUI', 'frame'):
+            self.draw_GUI_windows()
+
+    def draw_GUI_windows(self):
+        """ @brief Draws the windows of Graphite GUI, used by draw_GUI() """
         imgui.SetNextWindowPos([340,10],imgui.ImGuiCond_Once)
         imgui.SetNextWindowSize(
             [300,ps.get_window_size()[1]-20], imgui.ImGuiCond_Once
@@ -191,6 +379,7 @@ class GraphiteApp:
         self.terminal.draw()
         self.draw_progressbar_window()
         self.draw_dialogs()
+        Profiler.draw()
 
     #====== Main elements of GUI ==========================================
 
@@ -220,10 +409,8 @@ class GraphiteApp:
         if imgui.BeginMenuBar():
             if imgui.BeginMenu('File'):
                 if imgui.MenuItem('Load...'):
-                    exts = gom.get_environment_value(
-                        'grob_read_extensions'
-                    ).split(';')
-                    exts = [ ext.removeprefix('*.') for ext in exts if ext != '']
+                    exts = EnvironmentCache.get('grob_read_extensions')
+                    exts = [ ext.removeprefix('*.') for ext in exts ]
                     imgui_ext.OpenFileDialog(
                         'Load...',
                         exts,
@@ -237,6 +424,18 @@ class GraphiteApp:
                         'scene.graphite',
                         imgui_ext.ImGuiExtFileDialogFlags_Save
                     )
+                if imgui.MenuItem('Export history...'):
+                    imgui_ext.OpenFileDialog(
+                        'Export history',
+                        ['py'],
+                        'replay.py',
+                        imgui_ext.ImGuiExtFileDialogFlags_Save
+                    )
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'Python script that replays the commands of this '
+                        'session'
+                    )
                 imgui.Separator()
                 # SceneGraphGraphiteCommands: Implemented in Python, atr
                 # the end of this file, and registered in run()
@@ -259,6 +458,74 @@ class GraphiteApp:
                     'show terminal', None, self.terminal.visible
                 ):
                     self.terminal.visible = not self.terminal.visible
+                if imgui.MenuItem(
+                    'run commands in background', None,
+                    self.background_commands
+                ):
+                    self.background_commands = not self.background_commands
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'keep the GUI responsive while commands are running'
+                    )
+                if imgui.MenuItem(
+                    'level of detail', None, MeshGrobView.lod
+                ):
+                    self.scene_graph_view.set_lod(
+                        not MeshGrobView.lod, MeshGrobView.lod_max_triangles
+                    )
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'display large surfaces with a simplified proxy\n'
+                        '(except the selected one)'
+                    )
+                sel,max_triangles = imgui.InputInt(
+                    'max triangles', MeshGrobView.lod_max_triangles,
+                    100000, 1000000, imgui.ImGuiInputTextFlags_EnterReturnsTrue
+                )
+                if sel and max_triangles > 0:
+                    self.scene_graph_view.set_lod(
+                        MeshGrobView.lod, max_triangles
+                    )
+                if imgui.MenuItem(
+                    'record history', None, self.history.filename != None
+                ):
+                    self.history.filename = (
+                        None if self.history.filename != None
+                        else CommandHistory.default_filename
+                    )
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'append invoked commands to ' +
+                        CommandHistory.default_filename
+                    )
+                if imgui.MenuItem('profiler', None, Profiler.enabled):
+                    Profiler.set_enabled(not Profiler.enabled)
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'measure time spent in frames, commands and views'
+                    )
+                imgui.Separator()
+                imgui.Text(
+                    'skipped view updates: ' +
+                    str(self.scene_graph_view.nb_skipped_updates)
+                )
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'redundant view updates coalesced into a single one'
+                    )
+                imgui.Text(
+                    'main loop: {:.0f} fps, {:.0f}% CPU, {:.0f} ms'.format(
+                        self.loop_stats['fps'],
+                        100.0 * self.loop_stats['cpu_usage'],
+                        1000.0 * self.loop_stats['input_latency']
+                    )
+                )
+                if imgui.IsItemHovered():
+                    imgui.SetTooltip(
+                        'frames per second, CPU usage and input latency\n'
+                        '(longest wait before handling an event)\n'
+                        'during the last second'
+                    )
                 imgui.EndMenu()
             imgui.EndMenuBar()
 
@@ -267,14 +534,27 @@ class GraphiteApp:
         @brief Draws the GUI of the SceneGraph, with the editable list of objs
         """
         # Get scene objects, I do that instead of dir(self.scene_graph.objects)
-        # to keep the order of the objects.
-        objects = []
-        for i in range(self.scene_graph.nb_children):
-            objects.append(self.scene_graph.ith_child(i))
-
+        # to keep the order of the objects. The list is cached, and updated
+        # whenever the scene graph changes (see scene_objects_changed_CB())
+        if self.scene_objects == None:
+            self.scene_objects = [
+                self.scene_graph.ith_child(i)
+                for i in range(self.scene_graph.nb_children)
+            ]
+        objects = self.scene_objects
+
+        # Only the visible rows are drawn, the other ones are replaced with
+        # empty space (all rows have the same height)
         imgui.BeginListBox('##Objects',[-1,200])
-        for object in objects:
+        row_height = imgui.GetFrameHeightWithSpacing()
+        first = max(int(imgui.GetScrollY() / row_height) - 1, 0)
+        last = min(first + int(200 / row_height) + 3, len(objects))
+        if first > 0:
+            imgui.Dummy([1, first * row_height])
+        for object in objects[first:last]:
             self.draw_object_GUI(object)
+        if last < len(objects):
+            imgui.Dummy([1, (len(objects) - last) * row_height])
         imgui.EndListBox()
 
     def draw_object_GUI(self, object: OGF.Grob):
@@ -286,8 +566,9 @@ class GraphiteApp:
         """
         objname = object.name
         itemwidth = imgui.GetContentRegionAvail()[0]
+        locked = self.scene_graph_view.is_locked(object)
         show_buttons = (self.scene_graph.current_object == objname and
-                        self.rename_old == None)
+                        self.rename_old == None and not locked)
 
         if (show_buttons):
             itemwidth = itemwidth - 105
@@ -341,14 +622,17 @@ class GraphiteApp:
             if imgui.IsItemHovered():
                 imgui.SetTooltip(
                     objname + ':' + object.meta_class.name.removeprefix('OGF::')
+                    + (' (busy)' if locked else '')
                 )
             if sel:
                 self.scene_graph.current_object = objname
+                self.scene_graph_view.select_object(object)
                 if imgui.IsMouseDoubleClicked(0):
                     self.scene_graph_view.show_only(object)
                 self.scene_graph_view.highlight_object(object)
 
-        self.draw_object_menu(object)
+        if not locked:
+            self.draw_object_menu(object)
 
         if show_buttons:
             imgui.SameLine()
@@ -373,7 +657,9 @@ class GraphiteApp:
                 old_view = self.scene_graph_view.get_view(
                     self.scene_graph.current()
                 )
-                params = old_view.get_structure_params()
+                params = (
+                    {} if old_view == None else old_view.get_structure_params()
+                )
                 new_object = self.scene_graph.duplicate_current()
                 self.scene_graph.current_object = new_object.name
                 new_view = self.scene_graph_view.get_view(new_object)
@@ -382,10 +668,10 @@ class GraphiteApp:
                 self.rename_new = new_object.name
 
             if imgui.MenuItem('save object'):
-                exts = gom.get_environment_value(
+                exts = EnvironmentCache.get(
                     object.meta_class.name + '_write_extensions'
-                ).split(';')
-                exts = [ ext.removeprefix('*.') for ext in exts if ext != '' ]
+                )
+                exts = [ ext.removeprefix('*.') for ext in exts ]
                 imgui_ext.OpenFileDialog(
                     'Save object...',
                     exts,
@@ -394,23 +680,10 @@ class GraphiteApp:
                 )
                 self.object_to_save = object
 
-            if imgui.MenuItem('commit transform'):
-                self.scene_graph_view.get_view(object).commit_transform()
-            if imgui.IsItemHovered():
-                imgui.SetTooltip(
-                   'transforms vertices according to Polyscope transform guizmo'
-                )
-
-            if imgui.MenuItem('copy style to all'):
-                object_view = self.scene_graph_view.get_view(object)
-                params = object_view.get_structure_params()
-                for v in self.scene_graph_view.get_views():
-                    if v.grob.is_a(object.meta_class):
-                        v.set_structure_params(params)
-            if imgui.IsItemHovered():
-                imgui.SetTooltip(
-                    'copy graphic style to all objects of same type'
-                )
+            # view is None for an object created during this frame
+            view = self.scene_graph_view.get_view(object)
+            if view != None:
+                self.draw_view_menu(object, view)
 
             imgui.Separator()
             request = self.get_menu_map(object).draw_menus(object)
@@ -418,6 +691,36 @@ class GraphiteApp:
                 self.set_command(request)
             imgui.EndPopup()
 
+    def draw_view_menu(self, object: OGF.Grob, view):
+        """
+        @brief Draws the items of the object menu that act on its view
+        @param[in] object the object
+        @param[in] view the GrobView of the object
+        """
+        if imgui.MenuItem('commit transform'):
+            view.commit_transform()
+        if imgui.IsItemHovered():
+            imgui.SetTooltip(
+               'transforms vertices according to Polyscope transform guizmo'
+            )
+
+        if imgui.MenuItem('full resolution', None, view.full_resolution):
+            view.set_full_resolution(not view.full_resolution)
+        if imgui.IsItemHovered():
+            imgui.SetTooltip(
+               'never display a simplified proxy for this object'
+            )
+
+        if imgui.MenuItem('copy style to all'):
+            params = view.get_structure_params()
+            for v in self.scene_graph_view.get_views():
+                if v.grob.is_a(object.meta_class):
+                    v.set_structure_params(params)
+        if imgui.IsItemHovered():
+            imgui.SetTooltip(
+                'copy graphic style to all objects of same type'
+            )
+
     def draw_object_buttons(self, object: OGF.Grob):
         """
         @brief Draws and handles the buttons associated with an object
@@ -429,12 +732,14 @@ class GraphiteApp:
         if imgui.ArrowButton('^'+object.name,imgui.ImGuiDir_Up):
             self.scene_graph.current_object = object.name
             self.scene_graph.move_current_up()
+            self.scene_objects = None
         if imgui.IsItemHovered():
             imgui.SetTooltip('Move object up')
         imgui.SameLine()
         if imgui.ArrowButton('v'+object.name,imgui.ImGuiDir_Down):
             self.scene_graph.current_object = object.name
             self.scene_graph.move_current_down()
+            self.scene_objects = None
         if imgui.IsItemHovered():
             imgui.SetTooltip('Move object down')
         imgui.SameLine()
@@ -474,7 +779,7 @@ class GraphiteApp:
             # else Graphite will complain that the Interface is
             # locked when calling is_a() !!!
             if (self.request.object().meta_class.is_subclass_of(OGF.Interface)):
-                objnames = gom.get_environment_value(
+                objnames = EnvironmentCache.get(
                     grob.meta_class.name + '_instances'
                 )
                 imgui.Text('Object:')
@@ -513,6 +818,7 @@ class GraphiteApp:
         self.scene_file_to_load,_ = imgui_ext.FileDialog('Load...')
         self.scene_file_to_save,_ = imgui_ext.FileDialog('Save scene')
         self.object_file_to_save,_ = imgui_ext.FileDialog('Save object...')
+        self.history_file_to_save,_ = imgui_ext.FileDialog('Export history')
 
     def handle_queued_command(self):
         """
@@ -533,6 +839,7 @@ class GraphiteApp:
 
         if self.scene_file_to_load != '':
             self.scene_graph.load_object(self.scene_file_to_load)
+            self.history.record_load(self.scene_file_to_load)
             ps.reset_camera_to_home_view()
             self.scene_file_to_load = ''
 
@@ -548,6 +855,10 @@ class GraphiteApp:
             self.object_file_to_save = ''
             self.object_to_save = None
 
+        if self.history_file_to_save != '':
+            self.history.export_script(self.history_file_to_save)
+            self.history_file_to_save = ''
+
         self.terminal.handle_queued_command()
 
     def get_grob(self,request: OGF.Request) -> OGF.Grob:
@@ -569,13 +880,11 @@ class GraphiteApp:
         @brief Gets the MenuMap associated with a grob
         @param grob the Graphite object
         @details The MenuMap is constructed the first time the function is
-          called for a Grob class, then stored in a dictionary for the next
-          times
+          called for a Grob class, then shared by all objects of the class
+          (see MenuMap.get())
         @return the MenuMap associated with the graphite object
         """
-        if not grob.name in self.menu_maps:
-            self.menu_maps[grob.name] = MenuMap(grob.meta_class)
-        return self.menu_maps[grob.name]
+        return MenuMap.get(grob.meta_class)
 
     #===== Commands management ==============================================
 
@@ -591,7 +900,50 @@ class GraphiteApp:
 
     def invoke_command(self):
         """ Invokes current Graphite command with the args from the GUI """
-        self.request(**self.args) #**: expand dict as keywords func call
+        grob = self.get_grob(self.request)
+        if self.worker != None:
+            gom.err('Another command is running in the background\n')
+            return
+        if not self.background_commands or grob.is_a(OGF.SceneGraph):
+            # SceneGraph commands may create or delete any object, they
+            # are always executed synchronously
+            with Profiler.scope(self.request.method().name, 'command'):
+                self.history.run(self.request, self.args, grob)
+            return
+        self.scene_graph_view.lock(grob)
+        self.worker = threading.Thread(
+            target = self.background_command,
+            args = (self.request, self.args, grob),
+            daemon = True
+        )
+        self.worker.start()
+
+    def background_command(
+            self, request: OGF.Request, args: ArgList, grob: OGF.Grob
+    ):
+        """
+        @brief Executes a command, called in the worker thread
+        @details The grob is unlocked by the main thread once the command
+          is finished, see background_command_finished()
+        @param[in] request the Request to be executed
+        @param[in] args the arguments of the request
+        @param[in] grob the object locked during the command
+        """
+        try:
+            with Profiler.scope(request.method().name, 'command'):
+                self.history.run(request, args, grob)
+        except Exception as e:
+            self.post_to_main_thread(gom.err, 'Error: ' + str(e) + '\n')
+        self.post_to_main_thread(self.background_command_finished, grob)
+
+    def background_command_finished(self, grob: OGF.Grob):
+        """
+        @brief Called in the main thread when a background command is finished
+        @param[in] grob the object that was locked during the command
+        """
+        self.worker.join()
+        self.worker = None
+        self.scene_graph_view.unlock(grob)
 
 
 #============================================================================
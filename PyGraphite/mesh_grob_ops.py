@@ -1,15 +1,89 @@
 import numpy as np
-import gompy.types.OGF as OGF
+import gompy.gom as gom, gompy.types.OGF as OGF
+
+class GrobCache:
+    """
+    @brief Stores values computed from Graphite objects
+    @details Values stored for an object are discarded whenever it emits
+      value_changed (that is, when o.update() is called). The whole cache is
+      discarded whenever the list of objects in the SceneGraph changes.
+    """
+    entries = {}             # grob name -> (connection, dict of values)
+    scene_graph_connection = None
+
+    def get(o: OGF.Grob, key: str, compute: callable):
+        """
+        @brief Gets a value computed from an object
+        @param[in] o the object
+        @param[in] key the name of the value
+        @param[in] compute a function that takes o as an argument and
+          computes the value, called if the value is not in the cache
+        @return the (cached) value
+        """
+        if GrobCache.scene_graph_connection == None:
+            GrobCache.scene_graph_connection = gom.connect(
+                o.scene_graph().values_changed, GrobCache.clear
+            )
+        entry = GrobCache.entries.get(o.name, None)
+        if entry == None:
+            entry = (gom.connect(o.value_changed, GrobCache.invalidate), {})
+            GrobCache.entries[o.name] = entry
+        values = entry[1]
+        if key not in values:
+            values[key] = compute(o)
+        return values[key]
+
+    def invalidate(o: OGF.Grob):
+        """
+        @brief Discards all the values stored for an object
+        @param[in] o the object
+        """
+        entry = GrobCache.entries.pop(o.name, None)
+        if entry != None:
+            entry[0].remove() # Important! don't leave pending connections
+
+    def clear(new_list: str = ''):
+        """
+        @brief Discards all the values stored for all objects
+        @param[in] new_list the list of objects, ignored (this function is
+          connected to SceneGraph.values_changed)
+        """
+        for connection,_ in GrobCache.entries.values():
+            connection.remove()
+        GrobCache.entries = {}
+
+#==============================================================================
 
 class MeshGrobOps:
     def get_object_bbox(o: OGF.MeshGrob) -> tuple:
         """
         @brief gets the bounding-box of a MeshGrob
+        @details The result is cached until o.update() is called
+        @param[in] o: the MeshGrob
+        @return pmin,pmax the bounds, as numpy arrays (not to be modified)
+        """
+        return GrobCache.get(o, 'bbox', MeshGrobOps.compute_object_bbox)
+
+    def compute_object_bbox(o: OGF.MeshGrob, chunk_size: int = 65536) -> tuple:
+        """
+        @brief computes the bounding-box of a MeshGrob
+        @details Used internally by get_object_bbox(), that caches the result.
+          Min and max are computed chunk by chunk, so that each chunk is read
+          from memory only once.
         @param[in] o: the MeshGrob
+        @param[in] chunk_size: number of vertices in each chunk
         @return pmin,pmax the bounds, as numpy arrays
         """
         vertices = np.asarray(o.I.Editor.get_points())
-        return np.min(vertices,0), np.max(vertices,0)
+        if vertices.shape[0] == 0:
+            raise ValueError('bounding box of empty mesh')
+        pmin = np.full(vertices.shape[1],  np.inf)
+        pmax = np.full(vertices.shape[1], -np.inf)
+        for start in range(0, vertices.shape[0], chunk_size):
+            chunk = vertices[start:start+chunk_size]
+            np.minimum(pmin, np.min(chunk,0), out=pmin)
+            np.maximum(pmax, np.max(chunk,0), out=pmax)
+        return pmin, pmax
 
     def get_object_center(o: OGF.MeshGrob) -> np.ndarray:
         """
@@ -29,6 +103,93 @@ class MeshGrobOps:
         pmin,pmax = MeshGrobOps.get_object_bbox(o)
         return np.linalg.norm(pmax-pmin)
 
+    def get_object_edges(o: OGF.MeshGrob) -> tuple:
+        """
+        @brief gets the edges of the triangles of a MeshGrob
+        @details The result is cached until o.update() is called
+        @param[in] o: the MeshGrob
+        @return edges,facet_edges,edge_facets,boundary where edges is an
+          ne*2 array with the unique edges (smallest vertex index first),
+          facet_edges an nt*3 array with the edge index of each side of
+          each triangle (side i goes from vertex i to vertex i+1),
+          edge_facets an ne*2 array with the first two triangles incident
+          to each edge (-1 if there is no such triangle) and boundary an
+          array of ne booleans, True for edges with a single incident triangle
+        """
+        return GrobCache.get(o, 'edges', MeshGrobOps.compute_object_edges)
+
+    def compute_object_edges(o: OGF.MeshGrob) -> tuple:
+        """
+        @brief computes the edges of the triangles of a MeshGrob
+        @details Used internally by get_object_edges(), that caches the result
+        @param[in] o: the MeshGrob
+        @return edges,facet_edges,edge_facets,boundary
+          (see get_object_edges())
+        """
+        T = np.asarray(o.I.Editor.get_triangles())
+        nt = T.shape[0]
+        # the three sides of each triangle, with smallest vertex first,
+        # packed in 64 bits keys (side i of triangle t is halfedge 3*t+i)
+        H1 = T.reshape(-1).astype(np.uint64)
+        H2 = np.roll(T, -1, axis=1).reshape(-1).astype(np.uint64)
+        keys = (np.minimum(H1,H2) << np.uint64(32)) | np.maximum(H1,H2)
+        keys, facet_edges, nb_facets = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        edges = np.column_stack(
+            (keys >> np.uint64(32), keys & np.uint64(0xffffffff))
+        ).astype(T.dtype)
+        facet_edges = facet_edges.reshape(nt,3)
+        # halfedges sorted by edge, the ones of edge e start at first[e]
+        halfedges = np.argsort(facet_edges.reshape(-1), kind='stable')
+        first = np.cumsum(nb_facets) - nb_facets
+        edge_facets = np.full((keys.shape[0],2), -1, dtype=np.int64)
+        edge_facets[:,0] = halfedges[first] // 3
+        has_two = (nb_facets >= 2)
+        edge_facets[has_two,1] = halfedges[first[has_two]+1] // 3
+        boundary = (nb_facets == 1)
+        return edges, facet_edges, edge_facets, boundary
+
+    def decimate(
+            points: np.ndarray, triangles: np.ndarray, max_triangles: int
+    ) -> tuple:
+        """
+        @brief computes a simplified version of a triangle mesh by clustering
+          vertices in a regular grid
+        @details The grid is made coarser until the result has less than
+          max_triangles triangles
+        @param[in] points: an nv*3 array of vertices coordinates
+        @param[in] triangles: an nt*3 array of vertices indices
+        @param[in] max_triangles: maximum number of triangles in the result
+        @return vrtx,T,cluster the vertices and triangles of the simplified
+          mesh, and for each input vertex the index of the simplified
+          vertex it is merged into
+        """
+        pmin = np.min(points,0)
+        size = max(np.max(np.max(points,0) - pmin), 1e-30)
+        # a surface that fills the grid has about 2*res^2 triangles
+        res = max(int(np.sqrt(max_triangles/2)), 2)
+        while True:
+            cell = np.floor((points - pmin) * (res / size)).astype(np.int64)
+            np.clip(cell, 0, res-1, out=cell)
+            keys = (cell[:,0] * res + cell[:,1]) * res + cell[:,2]
+            _, cluster = np.unique(keys, return_inverse=True)
+            cluster = cluster.reshape(-1)
+            counts = np.bincount(cluster)
+            vrtx = np.column_stack([
+                np.bincount(cluster, weights=points[:,coord])
+                for coord in range(3)
+            ]) / counts[:,np.newaxis]
+            T = cluster[triangles]
+            # remove degenerate triangles and duplicated triangles
+            T = T[(T[:,0] != T[:,1]) & (T[:,1] != T[:,2]) & (T[:,2] != T[:,0])]
+            _, keep = np.unique(np.sort(T,axis=1), axis=0, return_index=True)
+            T = T[np.sort(keep)]
+            if T.shape[0] <= max_triangles or res == 2:
+                break
+            res = max(int(res * 0.7), 2)
+        return vrtx, T.astype(np.uint32), cluster
+
     def translate_object(o: OGF.MeshGrob, T: np.ndarray):
         """
         @brief Applies a translation to object's vertices
@@ -38,6 +199,7 @@ class MeshGrobOps:
         """
         vertices = np.asarray(o.I.Editor.get_points())
         vertices += T
+        GrobCache.invalidate(o)
 
     def transform_object(o: OGF.MeshGrob, xform: np.ndarray):
         """
@@ -51,18 +213,45 @@ class MeshGrobOps:
         if np.allclose(xform,np.eye(4)):
             return
         object_vertices = np.asarray(o.I.Editor.get_points())
-        vertices = np.c_[  # add a column of 1
-            object_vertices, np.ones(object_vertices.shape[0])
-        ]
-        # transform all the vertices
-        vertices = np.matmul(vertices,np.transpose(xform))
-        weights  = vertices[:,-1]                 # get 4th column
-        weights  = weights[:,np.newaxis]          # make it a Nx1 matrix
-        vertices = vertices[:,:-1]                # get the x,y,z coords
-        vertices = vertices/weights               # divide the x,y,z coords by w
-        # Could be written also in 1 line only (but less legible I think):
-        #    vertices = vertices[:,:-1] / vertices[:,-1][:,np.newaxis]
-        np.copyto(object_vertices,vertices)       # inject into graphite object
+        MeshGrobOps.transform_points(object_vertices[:,0:3], xform)
+        GrobCache.invalidate(o)
+
+    def transform_points(
+            vertices: np.ndarray, xform: np.ndarray, chunk_size: int = 65536
+    ):
+        """
+        @brief Applies a 4x4 homogeneous coord transform to an array of points
+        @details The array is transformed in-place, chunk by chunk, so that
+          temporary memory does not depend on the number of points. The
+          division by w is skipped if xform is affine.
+        @param[in,out] vertices an n*3 array of float32 or float64 (may be
+          a non-contiguous view)
+        @param[in] xform the 4x4 homogeneous coordinates transform
+           as a numpy array
+        @param[in] chunk_size number of points transformed at each step
+        """
+        dtype = vertices.dtype
+        M = np.ascontiguousarray(np.transpose(xform[0:3,0:3]), dtype=dtype)
+        T = np.asarray(xform[0:3,3], dtype=dtype)
+        affine = np.array_equal(xform[3], [0.0, 0.0, 0.0, 1.0])
+        if not affine:
+            W = np.asarray(xform[3,0:3], dtype=dtype)
+            w0 = dtype.type(xform[3,3])
+        n = vertices.shape[0]
+        tmp = np.empty((min(chunk_size,n),3), dtype=dtype)
+        if not affine:
+            weights = np.empty(min(chunk_size,n), dtype=dtype)
+        for start in range(0, n, chunk_size):
+            chunk = vertices[start:start+chunk_size]
+            result = tmp[0:chunk.shape[0]]
+            np.matmul(chunk, M, out=result)
+            result += T
+            if not affine:
+                w = weights[0:chunk.shape[0]]
+                np.matmul(chunk, W, out=w)
+                w += w0
+                result /= w[:,np.newaxis]
+            chunk[...] = result
 
     def set_triangle_mesh(o: OGF.MeshGrob, vrtx: np.ndarray, T: np.ndarray):
         """
@@ -82,6 +271,162 @@ class MeshGrobOps:
         o.update()
 
 
+    def create_tubes(
+            points: np.ndarray, edges: np.ndarray,
+            cyl_radius: float, sph_radius: float,
+            cyl_prec: int = 10, sph_prec: int = 2
+    ) -> tuple:
+        """
+        @brief creates a mesh with a cylinder for each edge and a sphere
+          for each vertex of a graph
+        @param[in] points: an nv*3 array of vertices coordinates
+        @param[in] edges: an ne*2 array of vertices indices
+        @param[in] cyl_radius , sph_radius: radius of cylinders and spheres,
+          nothing is generated if 0
+        @param[in] cyl_prec: number of vertices around each cylinder
+        @param[in] sph_prec: number of subdivisions of the spheres
+        @return vrtx,T the vertices and triangles, as numpy arrays
+        """
+        all_vrtx = [ np.empty((0,3)) ]
+        all_T = [ np.empty((0,3), dtype=np.uint32) ]
+        if cyl_radius != 0.0 and edges.shape[0] != 0:
+            vrtx,T = MeshGrobOps.create_cylinders(
+                points[edges[:,0]], points[edges[:,1]], cyl_radius, cyl_prec
+            )
+            all_vrtx.append(vrtx)
+            all_T.append(T)
+        if sph_radius != 0.0 and points.shape[0] != 0:
+            offset = np.uint32(sum(V.shape[0] for V in all_vrtx))
+            vrtx,T = MeshGrobOps.create_spheres(points, sph_radius, sph_prec)
+            all_vrtx.append(vrtx)
+            all_T.append(T + offset)
+        return np.concatenate(all_vrtx), np.concatenate(all_T)
+
+    def create_cylinders(
+            P1: np.ndarray, P2: np.ndarray, radius: float, prec: int = 10
+    ) -> tuple:
+        """
+        @brief creates a set of capped cylinders, in a single mesh
+        @details all cylinders are generated at once from a template, without
+          any Python loop
+        @param[in] P1 , P2: n*3 arrays with the extremities of the cylinders
+        @param[in] radius: the radius of the cylinders
+        @param[in] prec: number of vertices around each cylinder
+        @return vrtx,T the vertices and triangles of the cylinders, as
+          numpy arrays
+        """
+        n = P1.shape[0]
+
+        # template cylinder: two circles of prec vertices and two poles
+        # (z is the position along the axis, 0 or 1)
+        alpha = np.linspace(0.0, 2.0*np.pi, prec, endpoint=False)
+        C = np.cos(alpha)
+        S = np.sin(alpha)
+        i = np.arange(prec, dtype=np.uint32)
+        j = (i+1) % prec
+        bottom_pole = 2*prec
+        top_pole = 2*prec+1
+        tmpl_T = np.concatenate((
+            np.column_stack((i, j, j+prec)),                # side
+            np.column_stack((i, j+prec, i+prec)),           # side
+            np.column_stack((np.full(prec,bottom_pole), j, i)), # bottom cap
+            np.column_stack((np.full(prec,top_pole), i+prec, j+prec)) # top cap
+        )).astype(np.uint32)
+        nv = 2*prec+2
+
+        # per-instance frame: W along the axis, U and V orthogonal to it
+        W = P2 - P1
+        L = np.linalg.norm(W, axis=1)
+        degenerate = (L == 0.0)
+        L[degenerate] = 1.0
+        Wn = W / L[:,np.newaxis]
+        Wn[degenerate] = [0.0, 0.0, 1.0]
+        # pick the coordinate axis that is the most orthogonal to W
+        axis = np.zeros_like(W)
+        axis[np.arange(n), np.argmin(np.abs(Wn), axis=1)] = 1.0
+        U = np.cross(Wn, axis)
+        U /= np.linalg.norm(U, axis=1)[:,np.newaxis]
+        V = np.cross(Wn, U)
+        U *= radius
+        V *= radius
+
+        vrtx = np.empty((n, nv, 3))
+        circle = (C[np.newaxis,:,np.newaxis] * U[:,np.newaxis,:] +
+                  S[np.newaxis,:,np.newaxis] * V[:,np.newaxis,:])
+        vrtx[:, 0:prec, :] = P1[:,np.newaxis,:] + circle
+        vrtx[:, prec:2*prec, :] = P2[:,np.newaxis,:] + circle
+        vrtx[:, bottom_pole, :] = P1
+        vrtx[:, top_pole, :] = P2
+
+        T = (tmpl_T[np.newaxis,:,:] +
+             (np.arange(n, dtype=np.uint32) * nv)[:,np.newaxis,np.newaxis])
+        return vrtx.reshape(-1,3), T.reshape(-1,3)
+
+    def create_spheres(
+            centers: np.ndarray, radius: float, prec: int = 2
+    ) -> tuple:
+        """
+        @brief creates a set of spheres, in a single mesh
+        @details all spheres are generated at once from a template, without
+          any Python loop
+        @param[in] centers: an n*3 array with the centers of the spheres
+        @param[in] radius: the radius of the spheres
+        @param[in] prec: number of subdivisions of the icosahedron
+        @return vrtx,T the vertices and triangles of the spheres, as
+          numpy arrays
+        """
+        tmpl_vrtx, tmpl_T = MeshGrobOps.icosphere(prec)
+        n = centers.shape[0]
+        nv = tmpl_vrtx.shape[0]
+        vrtx = (centers[:,np.newaxis,:] +
+                radius * tmpl_vrtx[np.newaxis,:,:])
+        T = (tmpl_T[np.newaxis,:,:] +
+             (np.arange(n, dtype=np.uint32) * nv)[:,np.newaxis,np.newaxis])
+        return vrtx.reshape(-1,3), T.reshape(-1,3)
+
+    def icosphere(prec: int) -> tuple:
+        """
+        @brief creates a unit sphere by subdividing an icosahedron
+        @param[in] prec: number of subdivisions
+        @return vrtx,T the vertices and triangles of the sphere, as
+          numpy arrays
+        """
+        t = (1.0 + np.sqrt(5.0)) / 2.0
+        vrtx = np.array(
+            [[-1, t, 0], [ 1, t, 0], [-1,-t, 0], [ 1,-t, 0],
+             [ 0,-1, t], [ 0, 1, t], [ 0,-1,-t], [ 0, 1,-t],
+             [ t, 0,-1], [ t, 0, 1], [-t, 0,-1], [-t, 0, 1]], dtype=float
+        )
+        T = np.array(
+            [[0,11, 5], [0, 5, 1], [0, 1, 7], [0, 7,10], [0,10,11],
+             [1, 5, 9], [5,11, 4], [11,10,2], [10,7, 6], [7, 1, 8],
+             [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+             [4, 9, 5], [2, 4,11], [6, 2,10], [8, 6, 7], [9, 8, 1]],
+            dtype=np.uint32
+        )
+        for level in range(prec):
+            nv = vrtx.shape[0]
+            # the three edges of all triangles, and their unique indices
+            E = np.concatenate((T[:,[0,1]], T[:,[1,2]], T[:,[2,0]]))
+            E = np.sort(E, axis=1).astype(np.int64)
+            keys, edge_id = np.unique(
+                E[:,0] * nv + E[:,1], return_inverse=True
+            )
+            # one new vertex in the middle of each edge
+            mid = 0.5 * (vrtx[keys // nv] + vrtx[keys % nv])
+            vrtx = np.concatenate((vrtx, mid))
+            nt = T.shape[0]
+            m = (edge_id.reshape(3,nt) + nv).astype(np.uint32)
+            m01, m12, m20 = m[0], m[1], m[2]
+            T = np.concatenate((
+                np.column_stack((T[:,0], m01, m20)),
+                np.column_stack((T[:,1], m12, m01)),
+                np.column_stack((T[:,2], m20, m12)),
+                np.column_stack((m01, m12, m20))
+            ))
+        vrtx /= np.linalg.norm(vrtx, axis=1)[:,np.newaxis]
+        return vrtx, T
+
     def set_parametric_surface(
             o: OGF.MeshGrob,
             F: callable,
@@ -1,8 +1,11 @@
 import polyscope as ps
 import numpy as np
 import time
+import threading
+import zlib
 import gompy.gom as gom, gompy.types.OGF as OGF
 from mesh_grob_ops import MeshGrobOps
+from profiler import Profiler
 
 #==== PolyScope display for Graphite objects ==============================
 
@@ -15,8 +18,14 @@ class GrobView:
         @param[in] grob the Grob this GrobView is associated with
         """
         self.grob = grob
-        self.connection = gom.connect(grob.value_changed,self.update)
-        self.visible = True
+        self.connection = gom.connect(grob.value_changed,self.value_changed_CB)
+        self.structure = None
+        # objects saved as hidden are not displayed when loaded
+        self.visible = (self.get_grob_attribute('polyscope.enabled')!='False')
+        self.dirty = False # True if structures need to be created by show()
+        self.scene_graph_view = None # set by SceneGraphView.update_objects()
+        self.selected = False        # True for SceneGraph's current object
+        self.full_resolution = False # True to never display a LOD proxy
 
     def __del__(self):
         """
@@ -28,14 +37,50 @@ class GrobView:
     def show(self):
         """
         @brief Shows this view
+        @details PolyScope structures are created if they were not created
+          yet or if the object changed while it was hidden
         """
         self.visible = True
+        if self.dirty:
+            self.dirty = False
+            self.create_structures()
+            self.copy_grob_params_to_polyscope() # params loaded with object
+        if self.structure != None:
+            self.structure.set_enabled(True)
 
     def hide(self):
         """
         @brief Hides this view
+        @details PolyScope structures (and their GPU buffers) are removed
+          while the object is hidden, see invalidate()
         """
         self.visible = False
+        if self.structure != None:
+            self.structure.set_enabled(False)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        @brief Removes the PolyScope structures of a hidden view
+        @details Called by hide(), and by update() when the object changes
+          while it is hidden. PolyScope parameters are saved in the Grob,
+          and restored when structures are created again by show().
+        """
+        self.copy_polyscope_params_to_grob()
+        self.remove_structures()
+        self.dirty = True
+
+    def create_structures(self):
+        """
+        @brief Creates PolyScope structures
+        """
+        None
+
+    def remove_structures(self):
+        """
+        @brief Removes PolyScope structures
+        """
+        None
 
     def update(self,grob):
         """
@@ -44,6 +89,44 @@ class GrobView:
         """
         None
 
+    def value_changed_CB(self,grob):
+        """
+        @brief Called whenever the associated Grob emits value_changed
+        @details If this view is managed by a SceneGraphView, the update is
+          deferred to the next frame, so that bursts of signals trigger a
+          single update. Else the view is updated immediately.
+        """
+        if self.scene_graph_view != None:
+            # Deferred update, also makes sure that PolyScope structures
+            # are only touched by the main thread.
+            self.scene_graph_view.schedule_update(self)
+        else:
+            self.update(grob)
+
+    def set_selected(self, selected: bool):
+        """
+        @brief Indicates whether the object is the selected one
+        @param[in] selected True if the object is selected
+        """
+        self.selected = selected
+        self.update_lod()
+
+    def set_full_resolution(self, full_resolution: bool):
+        """
+        @brief Forces displaying the object at full resolution
+        @param[in] full_resolution if True, the object is never displayed
+          with a simplified proxy
+        """
+        self.full_resolution = full_resolution
+        self.update_lod()
+
+    def update_lod(self, force: bool = False):
+        """
+        @brief Updates PolyScope structures if the level of detail changed
+        @param[in] force if set, simplified proxies are recomputed
+        """
+        None
+
     def remove(self):
         """
         @brief Removes this View
@@ -71,6 +154,17 @@ class GrobView:
         """
         None
 
+    def get_grob_attribute(self, name: str) -> str:
+        """
+        @brief Gets an attribute of the Graphite object
+        @param[in] name the name of the attribute
+        @return the value of the attribute or '' if there is no such attribute
+        """
+        for i in range(self.grob.nb_grob_attributes()):
+            if self.grob.ith_grob_attribute_name(i) == name:
+                return self.grob.ith_grob_attribute_value(i)
+        return ''
+
     def get_structure_params(self, structure = None) -> dict:
         """
         @brief Gets parameters of a PolyScope structure
@@ -114,6 +208,10 @@ class GrobView:
         """
         @brief copies polyscope parameters from structure to graphite Grob
         """
+        if self.structure == None:
+            if not self.visible:
+                self.grob.set_grob_attribute('polyscope.enabled', 'False')
+            return
         params = self.get_structure_params()
         for k,v in params.items():
             self.grob.set_grob_attribute('polyscope.'+k, str(v))
@@ -163,17 +261,49 @@ class GrobView:
 class MeshGrobView(GrobView):
     """ PolyScope view for MeshGrob """
 
+    # Level of detail: if activated, surfaces with more than lod_max_triangles
+    # triangles are displayed with a simplified proxy, except the selected one
+    lod = False
+    lod_max_triangles = 1000000
+
     def __init__(self, o: OGF.MeshGrob):
         """
         @brief GrobView constructor
         @param[in] grob the MeshGrob this GrobView is associated with
         """
         super().__init__(o)
-        self.structure = None
+        self.structure_kind = None  # 'points', 'surface', 'volume' or None
+        self.nb_vertices = 0
+        self.connectivity = None    # fingerprint of the registered cells
+        self.nb_cells = 0           # number of registered faces/cells
+        self.proxy = False          # True if a simplified mesh is displayed
+        self.lod_cluster = None     # proxy vertex of each vertex
+        self.lod_counts = None      # number of vertices in each proxy vertex
+        self.attribute_fingerprints = {} # quantity name -> fingerprint
         self.old_attributes = []
         self.shown_attribute = ''
         self.component_attributes = []
-        self.create_structures()
+        if self.visible:
+            self.create_structures()
+        else:
+            self.dirty = True
+
+    def get_connectivity(self) -> tuple:
+        """
+        @brief Gets the kind of PolyScope structure and the cells of the mesh
+        @return kind,cells where kind is one of 'points','surface','volume'
+          or None if the mesh is empty, and cells is the array of triangles
+          or tetrahedra, or None for a pointset
+        """
+        E = self.grob.I.Editor
+        if E.nb_facets == 0 and E.nb_cells == 0:
+            if E.nb_vertices == 0:
+                return None, None
+            return 'points', None
+        elif E.nb_cells == 0:
+            return 'surface', np.asarray(E.get_triangles())
+        else:
+            return 'volume', np.asarray(E.get_tetrahedra())
 
     def create_structures(self):
         """
@@ -182,41 +312,148 @@ class MeshGrobView(GrobView):
         o = self.grob
         E = o.I.Editor
         pts = np.asarray(E.get_points())[:,0:3] # some meshes are in nD.
-
-        if E.nb_facets == 0 and E.nb_cells == 0:
-            if E.nb_vertices != 0:
-                self.structure = ps.register_point_cloud(o.name,pts)
-        elif E.nb_cells == 0:
-            self.structure = ps.register_surface_mesh(
-                o.name, pts,
-                np.asarray(o.I.Editor.get_triangles())
-            )
-        else:
-            self.structure = ps.register_volume_mesh(
-                o.name, pts,
-                np.asarray(o.I.Editor.get_tetrahedra())
+        kind, cells = self.get_connectivity()
+
+        self.proxy = (kind == 'surface' and self.use_proxy())
+        self.lod_cluster = None
+        self.lod_counts = None
+        if self.proxy:
+            pts, cells, self.lod_cluster = MeshGrobOps.decimate(
+                pts, cells, MeshGrobView.lod_max_triangles
             )
+            self.lod_counts = np.bincount(self.lod_cluster)
+
+        if kind == 'points':
+            self.structure = ps.register_point_cloud(o.name,pts)
+        elif kind == 'surface':
+            self.structure = ps.register_surface_mesh(o.name, pts, cells)
+        elif kind == 'volume':
+            self.structure = ps.register_volume_mesh(o.name, pts, cells)
 
         if self.structure == None:
             return
+        Profiler.count_bytes(
+            pts.nbytes + (0 if cells is None else cells.nbytes)
+        )
+
+        # Remember what was sent to PolyScope, used by update() to
+        # detect whether topology changed
+        self.structure_kind = kind
+        self.nb_vertices = E.nb_vertices
+        self.connectivity = (
+            None if cells is None or self.proxy
+            else MeshGrobView.connectivity_fingerprint(cells)
+        )
+        self.nb_cells = 0 if self.connectivity == None else cells.shape[0]
 
         self.structure.set_enabled(self.visible)
+        self.attribute_fingerprints = {}
+        self.update_attributes()
 
-        # Display scalar attributes
-        new_attributes = self.grob.list_attributes('vertices','double',1)
-        new_attributes = (
-            [] if new_attributes == '' else new_attributes.split(';')
+    def connectivity_fingerprint(cells: np.ndarray) -> tuple:
+        """
+        @brief Computes a fingerprint of the cells of a mesh
+        @details Used to detect topology changes without keeping a copy of
+          the cells array
+        @param[in] cells the cells array
+        @return the shape and the checksum of cells
+        """
+        return (cells.shape, zlib.adler32(np.ascontiguousarray(cells)))
+
+    def update_geometry(self) -> bool:
+        """
+        @brief Updates vertices positions and attributes in the existing
+          PolyScope structure if topology did not change
+        @retval True if the PolyScope structure could be updated
+        @retval False if topology changed and structures need to be recreated
+        """
+        if self.structure == None or self.proxy or self.use_proxy():
+            return False
+        E = self.grob.I.Editor
+        kind, cells = self.get_connectivity()
+        if kind != self.structure_kind or E.nb_vertices != self.nb_vertices:
+            return False
+        if (cells is not None and
+            MeshGrobView.connectivity_fingerprint(cells) != self.connectivity):
+            return False
+        pts = np.asarray(E.get_points())[:,0:3]
+        if kind == 'points':
+            self.structure.update_point_positions(pts)
+        else:
+            self.structure.update_vertex_positions(pts)
+        Profiler.count_bytes(pts.nbytes)
+        self.update_attributes()
+        return True
+
+    def use_proxy(self) -> bool:
+        """
+        @brief Tests whether the mesh should be displayed with a simplified
+          proxy
+        @retval True if level of detail is activated and the mesh is a surface
+          with more than lod_max_triangles facets that is neither selected
+          nor forced to full resolution
+        @retval False otherwise
+        """
+        if (
+                not MeshGrobView.lod or
+                self.selected or
+                self.full_resolution
+        ):
+            return False
+        E = self.grob.I.Editor
+        return (
+            E.nb_cells == 0 and E.nb_facets > MeshGrobView.lod_max_triangles
         )
+
+    def update_lod(self, force: bool = False):
+        if self.structure == None:
+            return
+        if self.proxy != self.use_proxy() or (force and self.proxy):
+            self.remove_structures()
+            self.create_structures()
+
+    def vertex_values(self, values: np.ndarray) -> np.ndarray:
+        """
+        @brief Converts values attached to the vertices of the mesh into
+          values attached to the vertices of the displayed structure
+        @details If a simplified proxy is displayed, values are averaged
+        @param[in] values an array with one value per vertex of the mesh
+        @return an array with one value per vertex of the structure
+        """
+        if self.lod_cluster is None:
+            return values
+        return np.bincount(self.lod_cluster, weights=values) / self.lod_counts
+
+    def update_attributes(self):
+        """
+        @brief Sends scalar attributes to the PolyScope structure
+        @details Quantities of attributes that no longer exist are removed,
+          the other ones are replaced in-place if they changed.
+        """
+        E = self.grob.I.Editor
+
+        # Display scalar attributes
+        new_attributes = []
+        for location in self.attribute_locations():
+            attributes = self.grob.list_attributes(location,'double',1)
+            if attributes != '':
+                new_attributes += attributes.split(';')
+        for attr in self.old_attributes:
+            if attr not in new_attributes:
+                name = MeshGrobView.quantity_name(attr)
+                self.structure.remove_quantity(name)
+                self.attribute_fingerprints.pop(name, None)
         # If there is a new attribute, show it
         # (else keep shown attribute if any)
         for attr in new_attributes:
             if attr not in self.old_attributes:
                 self.shown_attribute = attr
         for attr in new_attributes:
-            attrarray = np.asarray(E.find_attribute(attr))
-            self.structure.add_scalar_quantity(
-                attr.removeprefix('vertices.'),
-                attrarray, enabled = (attr == self.shown_attribute)
+            self.update_scalar_quantity(
+                MeshGrobView.quantity_name(attr),
+                np.asarray(E.find_attribute(attr)),
+                attr.split('.')[0],
+                attr == self.shown_attribute
             )
         self.old_attributes = new_attributes
 
@@ -224,10 +461,66 @@ class MeshGrobView(GrobView):
         for (attr, component) in self.component_attributes:
             attrarray = np.asarray(E.find_attribute('vertices.'+attr))
             attrname = attr + '[' + str(component) + ']'
+            self.update_scalar_quantity(
+                attrname, attrarray[:,component], 'vertices',
+                attrname == self.shown_attribute
+            )
+
+    def attribute_locations(self) -> list:
+        """
+        @brief Gets the mesh elements that can have displayed attributes
+        @return a list with 'vertices', and 'facets' for surfaces or 'cells'
+          for volumes if they are displayed as is
+        """
+        if self.structure_kind == 'surface' and not self.proxy:
+            return ['vertices','facets']
+        if self.structure_kind == 'volume':
+            return ['vertices','cells']
+        return ['vertices']
+
+    def quantity_name(attr: str) -> str:
+        """
+        @brief Gets the name of the PolyScope quantity of an attribute
+        @param[in] attr the full name of the attribute, for instance
+          'vertices.distance' or 'facets.area'
+        @return the name of the quantity, without prefix for vertices
+        """
+        return attr.removeprefix('vertices.')
+
+    def update_scalar_quantity(
+            self, name: str, values: np.ndarray, location: str, enabled: bool
+    ):
+        """
+        @brief Sends a scalar quantity to the PolyScope structure if it changed
+        @details A fingerprint (address, shape and checksum) of the values
+          is kept for each quantity, so that values are uploaded only if
+          they changed since last time.
+        @param[in] name the name of the quantity
+        @param[in] values an array with one value per mesh element
+        @param[in] location one of 'vertices','facets','cells'
+        @param[in] enabled True if the quantity is shown
+        """
+        fingerprint = (
+            values.__array_interface__['data'][0], values.shape,
+            zlib.adler32(np.ascontiguousarray(values)), enabled
+        )
+        if self.attribute_fingerprints.get(name, None) == fingerprint:
+            return
+        if location == 'vertices':
+            self.structure.add_scalar_quantity(
+                name, self.vertex_values(values), enabled = enabled
+            )
+        else:
+            # facets/cells are sent as is, this requires the mesh
+            # to have only triangles/tetrahedra
+            if values.shape[0] != self.nb_cells:
+                return
             self.structure.add_scalar_quantity(
-                attrname, attrarray[:,component],
-                enabled = (attrname == self.shown_attribute)
+                name, values, enabled = enabled,
+                defined_on = ('faces' if location == 'facets' else 'cells')
             )
+        self.attribute_fingerprints[name] = fingerprint
+        Profiler.count_bytes(values.nbytes)
 
     def remove_structures(self):
         """
@@ -236,27 +529,28 @@ class MeshGrobView(GrobView):
         if self.structure != None:
             self.structure.remove()
         self.structure = None
+        self.structure_kind = None
+        self.connectivity = None
+        self.nb_cells = 0
+        self.proxy = False
+        self.attribute_fingerprints = {}
 
     def remove(self):
         self.remove_structures()
         super().remove()
 
-    def show(self):
-        super().show()
-        if self.structure == None:
-            return
-        self.structure.set_enabled(True)
-
-    def hide(self):
-        super().hide()
-        if self.structure == None:
-            return
-        self.structure.set_enabled(False)
-
     def update(self,grob):
         super().update(grob)
-        self.remove_structures()
-        self.create_structures()
+        if not self.visible:
+            self.invalidate() # structures will be created by show()
+            return
+        with Profiler.scope('update ' + grob.name, 'view'):
+            # Fast path: if topology did not change (for instance, vertices
+            # were moved), only send new positions to the existing structures
+            if self.update_geometry():
+                return
+            self.remove_structures()
+            self.create_structures()
 
     def commit_transform(self):
         super().commit_transform()
@@ -317,10 +611,12 @@ class VoxelGrobView(GrobView):
     """ PolyScope view for VoxelGrob """
     def __init__(self, o: OGF.VoxelGrob):
         super().__init__(o)
-        self.structure = None
-        self.create_structures()
         self.old_attributes = []
         self.shown_attribute = ''
+        if self.visible:
+            self.create_structures()
+        else:
+            self.dirty = True
 
     def create_structures(self):
         """
@@ -366,22 +662,14 @@ class VoxelGrobView(GrobView):
         self.remove_structures()
         super().remove()
 
-    def show(self):
-        super().show()
-        if self.structure == None:
-            return
-        self.structure.set_enabled(True)
-
-    def hide(self):
-        super().hide()
-        if self.structure == None:
-            return
-        self.structure.set_enabled(False)
-
     def update(self,grob):
         super().update(grob)
-        self.remove_structures()
-        self.create_structures()
+        if not self.visible:
+            self.invalidate() # structures will be created by show()
+            return
+        with Profiler.scope('update ' + grob.name, 'view'):
+            self.remove_structures()
+            self.create_structures()
 
     def highlight(self):
         try:
@@ -409,6 +697,9 @@ class SceneGraphView(GrobView):
     @details Manages a dictionary that maps Grob names to PolyScope views
     """
 
+    view_factories = []     # (meta-class, view factory) pairs
+    view_factory_cache = {} # Graphite class name -> view factory
+
     def __init__(self, grob: OGF.SceneGraph):
         """
         @brief SceneGraphView constructor
@@ -416,9 +707,30 @@ class SceneGraphView(GrobView):
         """
         super().__init__(grob)
         self.view_map = {}
-        gom.connect(grob.values_changed, self.update_objects)
+        self.dirty_views = set()      # views to be updated at next frame
+        self.nb_skipped_updates = 0   # number of coalesced view updates
+        self.locked = set()           # names of grobs edited by a worker
+        self.queued_object_list = None
+        # protects dirty_views, nb_skipped_updates and queued_object_list,
+        # modified by the signals of commands running in a worker thread
+        self.dirty_lock = threading.Lock()
+        gom.connect(grob.values_changed, self.values_changed_CB)
         self.highlighted = None
         self.highlight_timestamp = 0.0
+        self.selected = None
+
+    def values_changed_CB(self,new_list: str):
+        """
+        @brief Called whenever the list of Graphite objects changed
+        @details If called from a worker thread, the update is deferred to
+          the main thread, in update_dirty_views()
+        @param[in] new_list the new list of objects as a ';'-separated string
+        """
+        if threading.current_thread() is threading.main_thread():
+            self.update_objects(new_list)
+        else:
+            with self.dirty_lock:
+                self.queued_object_list = new_list
 
     def update_objects(self,new_list: str):
         """
@@ -427,30 +739,132 @@ class SceneGraphView(GrobView):
         @details Called whenever the list of Graphite objects changed
         """
 
-        old_list = list(self.view_map.keys())
-        new_list = [] if new_list == '' else new_list.split(';')
+        new_list = set() if new_list == '' else set(new_list.split(';'))
 
         # Remove views for objects that are no longer there
-        for objname in old_list:
-            if objname not in new_list:
-                self.view_map[objname].remove()
-                del self.view_map[objname]
+        for objname in self.view_map.keys() - new_list:
+            if self.selected == objname:
+                self.selected = None
+            with self.dirty_lock:
+                self.dirty_views.discard(self.view_map[objname])
+            self.view_map[objname].remove()
+            del self.view_map[objname]
 
         # Create views for new objects
-        for objname in new_list:
+        for objname in new_list - self.view_map.keys():
             object = getattr(self.grob.objects, objname)
-            if objname not in self.view_map:
-                viewclassname = (
-                    object.meta_class.name.removeprefix('OGF::')+'View'
-                )
-                try:
-                    self.view_map[objname] = globals()[viewclassname](object)
-                except:
-                    print('Error: ', viewclassname, ' no such view class')
-                    self.view_map[objname] = GrobView(object) # dummy view
+            view = SceneGraphView.view_factory(object)(object)
+            view.scene_graph_view = self
+            self.view_map[objname] = view
+            # copy viewing parameters from loaded object to polyscope
+            view.copy_grob_params_to_polyscope()
+
+    def register_view_factory(mclass: OGF.MetaClass, factory: callable):
+        """
+        @brief Declares the function that creates the views of a class
+          of Graphite objects
+        @details The factory is used for the objects of class mclass and
+          of its subclasses, unless a factory is registered for a more
+          specific subclass. It can be used to plug-in a specialized view,
+          for instance a faster view for large data, without editing this
+          file.
+        @param[in] mclass the meta-class of the Graphite objects, for
+          instance OGF.MeshGrob
+        @param[in] factory a function that takes a Graphite object and that
+          returns a GrobView, for instance a subclass of GrobView
+        """
+        SceneGraphView.view_factories = [
+            (m,f) for (m,f) in SceneGraphView.view_factories
+            if m.name != mclass.name
+        ]
+        SceneGraphView.view_factories.append((mclass, factory))
+        SceneGraphView.view_factory_cache.clear()
+
+    def view_factory(o: OGF.Grob) -> callable:
+        """
+        @brief Gets the function that creates the view of an object
+        @details Uses the factory registered for the most specific
+          superclass of the class of the object. The result is cached for
+          each Graphite class.
+        @param[in] o the object
+        @return the view factory, or GrobView (dummy view) if no factory
+          was registered for the class of o or one of its superclasses
+        """
+        mclass = o.meta_class
+        factory = SceneGraphView.view_factory_cache.get(mclass.name, None)
+        if factory != None:
+            return factory
+        best = None
+        for (m,f) in SceneGraphView.view_factories:
+            if mclass.is_subclass_of(m) and (
+                best == None or m.is_subclass_of(best[0])
+            ):
+                best = (m,f)
+        if best == None:
+            print('Error: ', mclass.name, ' no view factory')
+            factory = GrobView # dummy view
+        else:
+            factory = best[1]
+        SceneGraphView.view_factory_cache[mclass.name] = factory
+        return factory
+
+    def schedule_update(self, view: GrobView):
+        """
+        @brief Marks a view for update at next frame
+        @param[in] view the view, updated by update_dirty_views()
+        """
+        with self.dirty_lock: # may be called by a worker thread
+            if view in self.dirty_views:
+                self.nb_skipped_updates = self.nb_skipped_updates + 1
+            else:
+                self.dirty_views.add(view)
 
-        # copy viewing parameters from loaded objects to polyscope
-        self.copy_grob_params_to_polyscope()
+    def update_dirty_views(self):
+        """
+        @brief Updates all the views marked by schedule_update()
+        @details Called once per frame by the application main loop.
+          Nothing is done while a worker thread runs a command, since the
+          command may be filling any object, including the ones it creates.
+          Views are created and updated once the command is finished.
+        """
+        if len(self.locked) != 0:
+            return
+        with self.dirty_lock:
+            new_list = self.queued_object_list
+            self.queued_object_list = None
+            dirty_views = self.dirty_views
+            self.dirty_views = set() # updating may trigger new signals
+        if new_list != None:
+            self.update_objects(new_list)
+        for view in dirty_views:
+            view.update(view.grob)
+
+    def lock(self, o: OGF.Grob):
+        """
+        @brief Locks an object while a worker thread operates on it
+        @details All view updates are deferred until all objects are
+          unlocked
+        @param[in] o the object
+        """
+        self.locked.add(o.name)
+
+    def unlock(self, o: OGF.Grob):
+        """
+        @brief Unlocks an object previously locked by lock()
+        @param[in] o the object
+        """
+        self.locked.discard(o.name)
+
+    def is_locked(self, o: OGF.Grob) -> bool:
+        """
+        @brief Tests whether an object is locked by a worker thread
+        @details Objects created by a command running in a worker thread
+          have no view yet, they are considered as locked as well
+        @param[in] o the object
+        @retval True if o is locked
+        @retval False otherwise
+        """
+        return o.name in self.locked or o.name not in self.view_map
 
     def show_all(self):
         """ @brief Shows all objects """
@@ -468,27 +882,62 @@ class SceneGraphView(GrobView):
         @param[in] obj the object to be shown, all other objects will be hidden
         """
         self.hide_all()
-        self.view_map[obj.name].show()
+        view = self.view_map.get(obj.name, None)
+        if view != None: # view is created at next frame for a new object
+            view.show()
 
     def commit_transform(self):
         super().commit_transform()
         for shd in self.view_map.values():
-            shd.commit_transform()
+            if not self.is_locked(shd.grob):
+                shd.commit_transform()
 
     def highlight_object(self, o:OGF.Grob):
-        if self.highlighted != None:
-            self.view_map[self.highlighted].unhighlight()
+        self.unhighlight_object(True)
+        if o.name not in self.view_map: # view is created at next frame
+            return
         self.view_map[o.name].highlight()
         self.highlighted = o.name
         self.highlight_timestamp = time.time()
 
-    def unhighlight_object(self):
+    def unhighlight_object(self, force: bool = False):
         if self.highlighted == None:
             return
-        if time.time() - self.highlight_timestamp > 0.25:
-            self.view_map[self.highlighted].unhighlight()
+        if force or time.time() - self.highlight_timestamp > 0.25:
+            view = self.view_map.get(self.highlighted, None)
+            if view != None:
+                view.unhighlight()
             self.highlighted = None
 
+    def select_object(self, o: OGF.Grob):
+        """
+        @brief Indicates the selected object
+        @details The selected object is always displayed at full resolution
+        @param[in] o the selected object
+        """
+        if self.selected == o.name:
+            return
+        if self.selected != None and self.selected in self.view_map:
+            self.view_map[self.selected].set_selected(False)
+        if o.name not in self.view_map: # view is created at next frame
+            self.selected = None
+            return
+        self.selected = o.name
+        self.view_map[o.name].set_selected(True)
+
+    def set_lod(self, lod: bool, max_triangles: int):
+        """
+        @brief Configures the level of detail of all views
+        @param[in] lod True if large surfaces are displayed with a
+          simplified proxy
+        @param[in] max_triangles maximum number of triangles of a surface
+          displayed at full resolution
+        """
+        MeshGrobView.lod = lod
+        MeshGrobView.lod_max_triangles = max_triangles
+        for v in self.view_map.values():
+            v.update_lod(True)
+
     def copy_polyscope_params_to_grob(self):
         for v in self.view_map.values():
             v.copy_polyscope_params_to_grob()
@@ -513,3 +962,6 @@ class SceneGraphView(GrobView):
         return self.view_map.values()
 
 #===========================================================
+
+SceneGraphView.register_view_factory(OGF.MeshGrob,  MeshGrobView)
+SceneGraphView.register_view_factory(OGF.VoxelGrob, VoxelGrobView)
@@ -0,0 +1,197 @@
+import polyscope.imgui as imgui
+import time, threading, os, json, collections
+
+#=========================================================================
+
+class ProfilerScope:
+    """
+    @brief Measures the time spent in a block of code
+    @details Created by Profiler.scope(), used in a 'with' statement
+    """
+
+    def __init__(self, name: str, category: str):
+        """
+        @brief ProfilerScope constructor
+        @param[in] name the name of the measured operation
+        @param[in] category one of 'frame', 'command', 'view', 'terminal'
+        """
+        self.name = name
+        self.category = category
+        self.nb_bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        Profiler.stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Profiler.stack().pop()
+        Profiler.record(self, time.perf_counter() - self.start)
+        return False
+
+class NullScope:
+    """ @brief Does nothing, used by Profiler.scope() if profiler is off """
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+#=========================================================================
+
+class Profiler:
+    """
+    @brief Measures where PyGraphite spends time
+    @details Instrumented functions use 'with Profiler.scope(name,category):'
+      which costs nearly nothing when the profiler is disabled. Measures
+      are displayed in the profiler window (per-frame breakdown averaged
+      over the last frames, last commands and last view updates with the
+      number of bytes sent to PolyScope), and can be saved in Chrome
+      trace-event format (to be opened with chrome://tracing or Perfetto).
+    """
+    enabled = False
+    visible = False
+    nb_frames = 120          # number of frames averaged in the window
+    max_events = 100000      # number of events kept for the trace
+    events = collections.deque(maxlen=max_events) # Chrome trace events
+    frames = collections.deque(maxlen=nb_frames)  # name -> time, per frame
+    current_frame = collections.defaultdict(float)
+    commands = collections.deque(maxlen=10)       # (name, time)
+    views = collections.deque(maxlen=10)          # (name, time, bytes)
+    origin = time.perf_counter()
+    local = threading.local()
+    null_scope = NullScope()
+
+    def scope(name: str, category: str):
+        """
+        @brief Gets an object that measures the time spent in a 'with' block
+        @param[in] name the name of the measured operation
+        @param[in] category one of 'frame', 'command', 'view', 'terminal'
+        @return a context manager
+        """
+        if not Profiler.enabled:
+            return Profiler.null_scope
+        return ProfilerScope(name, category)
+
+    def stack() -> list:
+        """
+        @brief Gets the stack of active scopes of the calling thread
+        @return the list of active scopes, innermost last
+        """
+        if not hasattr(Profiler.local, 'stack'):
+            Profiler.local.stack = []
+        return Profiler.local.stack
+
+    def count_bytes(nb_bytes: int):
+        """
+        @brief Adds a number of bytes to the innermost active scope
+        @details Used to measure the size of data sent to PolyScope
+        @param[in] nb_bytes the number of bytes
+        """
+        if not Profiler.enabled:
+            return
+        stack = Profiler.stack()
+        if len(stack) != 0:
+            stack[-1].nb_bytes = stack[-1].nb_bytes + nb_bytes
+
+    def record(scope: ProfilerScope, elapsed: float):
+        """
+        @brief Stores the measure of a scope (used internally)
+        @param[in] scope the scope
+        @param[in] elapsed the time spent in the scope, in seconds
+        """
+        # the per-frame breakdown only has the scopes of the main loop,
+        # commands (possibly running in a worker thread) are listed apart
+        if (
+            scope.category != 'command' and
+            threading.current_thread() is threading.main_thread()
+        ):
+            Profiler.current_frame[scope.name] += elapsed
+        event = {
+            'name': scope.name, 'cat': scope.category, 'ph': 'X',
+            'ts': (scope.start - Profiler.origin) * 1e6, 'dur': elapsed * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident()
+        }
+        if scope.nb_bytes != 0:
+            event['args'] = { 'bytes': scope.nb_bytes }
+        Profiler.events.append(event)
+        if scope.category == 'command':
+            Profiler.commands.append((scope.name, elapsed))
+        elif scope.category == 'view':
+            Profiler.views.append((scope.name, elapsed, scope.nb_bytes))
+
+    def end_frame():
+        """
+        @brief Stores the measures of the current frame
+        @details Called once per iteration by the application main loop
+        """
+        if not Profiler.enabled:
+            return
+        Profiler.frames.append(Profiler.current_frame)
+        Profiler.current_frame = collections.defaultdict(float)
+
+    def set_enabled(enabled: bool):
+        """
+        @brief Starts or stops the profiler
+        @param[in] enabled True to start, False to stop
+        """
+        Profiler.enabled = enabled
+        Profiler.visible = enabled
+
+    def clear():
+        """ @brief Discards all the measures """
+        Profiler.events.clear()
+        Profiler.frames.clear()
+        Profiler.commands.clear()
+        Profiler.views.clear()
+        Profiler.current_frame = collections.defaultdict(float)
+
+    def save_chrome_trace(filename: str):
+        """
+        @brief Saves the measures in Chrome trace-event format
+        @param[in] filename the name of the JSON file
+        """
+        with open(filename, 'w') as f:
+            json.dump(
+                {'traceEvents': list(Profiler.events),
+                 'displayTimeUnit': 'ms'},
+                f
+            )
+
+    def draw():
+        """ @brief Draws the profiler window """
+        if not Profiler.visible:
+            return
+        imgui.SetNextWindowPos([1270,10],imgui.ImGuiCond_Once)
+        imgui.SetNextWindowSize([300,400],imgui.ImGuiCond_Once)
+        _,Profiler.visible = imgui.Begin('Profiler', Profiler.visible)
+        nb_frames = max(len(Profiler.frames),1)
+        totals = collections.defaultdict(float)
+        for frame in Profiler.frames:
+            for name, elapsed in frame.items():
+                totals[name] += elapsed
+        imgui.Text('Per frame (last ' + str(len(Profiler.frames)) + '):')
+        for name, total in sorted(totals.items(), key=lambda x: -x[1]):
+            imgui.Text(
+                '  {:8.3f} ms {}'.format(1000.0 * total / nb_frames, name)
+            )
+        imgui.Separator()
+        imgui.Text('Last commands:')
+        for name, elapsed in reversed(Profiler.commands):
+            imgui.Text('  {:8.3f} s  {}'.format(elapsed, name))
+        imgui.Separator()
+        imgui.Text('Last view updates:')
+        for name, elapsed, nb_bytes in reversed(Profiler.views):
+            imgui.Text('  {:8.3f} ms {:8.1f} MB {}'.format(
+                1000.0 * elapsed, nb_bytes / 1e6, name
+            ))
+        imgui.Separator()
+        if imgui.Button('save trace'):
+            filename = time.strftime('pygraphite_trace_%Y%m%d_%H%M%S.json')
+            Profiler.save_chrome_trace(filename)
+            print('Saved trace to ' + os.path.abspath(filename))
+        if imgui.IsItemHovered():
+            imgui.SetTooltip('Chrome trace-event format (chrome://tracing)')
+        imgui.SameLine()
+        if imgui.Button('clear'):
+            Profiler.clear()
+        imgui.End()
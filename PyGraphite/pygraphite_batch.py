@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+
+# Headless version of PyGraphite: applies a pipeline of Graphite commands
+# to all the meshes of a directory, without PolyScope window.
+#
+# Usage:
+#   python3 pygraphite_batch.py pipeline.txt input_dir output_dir \
+#      [--jobs N] [--output-ext ext] [--report report.csv]
+#
+# The pipeline is a text file with one command per line, of the form
+#   interface.method(args)
+# where interface is the name of a Commands interface of MeshGrob (the
+# name of the Commands class without 'MeshGrob' and 'Commands', for
+# instance Surface for MeshGrobSurfaceCommands or PyGraphite for the Python
+# commands in mesh_grob_commands.py) and args are Python literals, for
+# instance:
+#   # lines starting with '#' are comments
+#   Surface.remesh_smooth(nb_points=30000)
+#   PyGraphite.flip_or_rotate(axis='ROT_X', center=True)
+
+import sys, os, time, ast, argparse, csv
+import multiprocessing
+
+#=====================================================
+
+class PipelineStep:
+    """ @brief A command in a pipeline, of the form interface.method(args) """
+
+    def __init__(self, line: str):
+        """
+        @brief PipelineStep constructor
+        @param[in] line the command, as a string
+        @throws ValueError if line is not of the form interface.method(args)
+        """
+        self.line = line
+        call = ast.parse(line, mode='eval').body
+        if (
+                not isinstance(call, ast.Call) or
+                not isinstance(call.func, ast.Attribute) or
+                not isinstance(call.func.value, ast.Name)
+        ):
+            raise ValueError(line + ': expected interface.method(args)')
+        self.interface = call.func.value.id
+        self.method = call.func.attr
+        self.args = [ ast.literal_eval(arg) for arg in call.args ]
+        self.kwargs = {
+            kw.arg : ast.literal_eval(kw.value) for kw in call.keywords
+        }
+
+    def __call__(self, grob):
+        """
+        @brief Applies the command to a Graphite object
+        @param[in,out] grob the Graphite object
+        """
+        interface = getattr(grob.I, self.interface)
+        getattr(interface, self.method)(*self.args, **self.kwargs)
+
+def read_pipeline(filename: str) -> list:
+    """
+    @brief Reads a pipeline description
+    @param[in] filename a text file with one command per line
+    @return a list of PipelineStep
+    """
+    steps = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            steps.append(PipelineStep(line))
+    return steps
+
+#=====================================================
+# Worker processes. Each process has its own SceneGraph.
+
+scene_graph = None
+pipeline = None
+errors = [] # error messages reported by Graphite during the current step
+
+def err_CB(msg: str):
+    """
+    @brief Called whenever Graphite reports an error
+    @details Native commands often report failures with gom.err() rather
+      than raising an exception
+    @param[in] msg the error message
+    """
+    errors.append(msg)
+
+def check_errors():
+    """
+    @brief Raises an exception if Graphite reported errors since last call
+    """
+    if len(errors) != 0:
+        msg = ''.join(errors).strip()
+        errors.clear()
+        raise RuntimeError(msg)
+
+def init_worker(pipeline_filename: str):
+    """
+    @brief Initializes a worker process
+    @details Creates the SceneGraph, registers the Python commands,
+      listens to error messages and reads the pipeline
+    @param[in] pipeline_filename the pipeline description
+    """
+    global scene_graph, pipeline
+    from auto_gui import PyAutoGUI # imports polyscope before gompy
+    import gompy.gom as gom, gompy.types.OGF as OGF
+    from mesh_grob_commands import MeshGrobPyGraphiteCommands
+    scene_graph = OGF.SceneGraph()
+    application = OGF.ApplicationBase()
+    scene_graph.application = application
+    gom.connect(application.err, err_CB)
+    application.start()
+    PyAutoGUI.register_commands(
+        scene_graph, OGF.MeshGrob, MeshGrobPyGraphiteCommands
+    )
+    pipeline = read_pipeline(pipeline_filename)
+
+def process_file(job: tuple) -> dict:
+    """
+    @brief Applies the pipeline to a file
+    @param[in] job a tuple with the input and output filenames
+    @return a dictionary with the timings and the error message if any
+    """
+    input_file, output_file = job
+    report = {
+        'file': input_file, 'status': 'OK', 'load_time': 0.0,
+        'pipeline_time': 0.0, 'save_time': 0.0, 'total_time': 0.0,
+        'failed_step': '', 'error': ''
+    }
+    start = time.perf_counter()
+    step = None
+    errors.clear()
+    try:
+        t0 = time.perf_counter()
+        grob = scene_graph.load_object(input_file)
+        if grob == None:
+            check_errors()
+            raise RuntimeError('could not load file')
+        check_errors()
+        t1 = time.perf_counter()
+        for step in pipeline:
+            step(grob)
+            check_errors()
+        step = None
+        t2 = time.perf_counter()
+        grob.save(output_file)
+        check_errors()
+        t3 = time.perf_counter()
+        report['load_time'] = t1 - t0
+        report['pipeline_time'] = t2 - t1
+        report['save_time'] = t3 - t2
+    except Exception as e:
+        report['status'] = 'FAILED'
+        report['error'] = str(e)
+        if step != None:
+            report['failed_step'] = step.line
+    scene_graph.clear()
+    report['total_time'] = time.perf_counter() - start
+    return report
+
+#=====================================================
+
+def main(argv: list) -> int:
+    """
+    @brief Main entry point
+    @param[in] argv command line arguments
+    @return 0 if all files were processed, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(
+        description='Applies a pipeline of Graphite commands to a directory'
+    )
+    parser.add_argument('pipeline', help='pipeline file, one cmd per line')
+    parser.add_argument('input_dir', help='directory with the input meshes')
+    parser.add_argument('output_dir', help='directory for the output meshes')
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=os.cpu_count(),
+        help='number of worker processes'
+    )
+    parser.add_argument(
+        '--output-ext', default=None,
+        help='extension of output files (default: same as input)'
+    )
+    parser.add_argument(
+        '--report', default=None,
+        help='CSV report (default: output_dir/report.csv)'
+    )
+    args = parser.parse_args(argv[1:])
+
+    read_pipeline(args.pipeline) # check syntax before starting workers
+
+    from auto_gui import EnvironmentCache # imports polyscope before gompy
+    exts = [
+        ext.removeprefix('*')
+        for ext in EnvironmentCache.get('grob_read_extensions')
+    ]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = []
+    for f in sorted(os.listdir(args.input_dir)):
+        base,ext = os.path.splitext(f)
+        if ext.lower() not in exts:
+            continue
+        if args.output_ext != None:
+            ext = '.' + args.output_ext.removeprefix('.')
+        jobs.append(
+            (os.path.join(args.input_dir,f),
+             os.path.join(args.output_dir, base + ext))
+        )
+
+    report_file = args.report
+    if report_file == None:
+        report_file = os.path.join(args.output_dir, 'report.csv')
+
+    start = time.perf_counter()
+    nb_failed = 0
+    # spawn rather than fork, so that each worker has its own Graphite
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(
+        args.jobs, initializer=init_worker, initargs=(args.pipeline,)
+    ) as pool, open(report_file, 'w', newline='') as f:
+        writer = None
+        for report in pool.imap_unordered(process_file, jobs):
+            if writer == None:
+                writer = csv.DictWriter(f, fieldnames=report.keys())
+                writer.writeheader()
+            writer.writerow(report)
+            f.flush()
+            if report['status'] != 'OK':
+                nb_failed = nb_failed + 1
+            print(
+                report['status'], report['file'],
+                '{:.3f}s'.format(report['total_time']),
+                report['failed_step'], report['error']
+            )
+    elapsed = time.perf_counter() - start
+    print(
+        len(jobs), 'files,', nb_failed, 'failed,',
+        '{:.3f}s'.format(elapsed), '- report in', report_file
+    )
+    return 0 if nb_failed == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
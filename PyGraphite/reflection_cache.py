@@ -0,0 +1,182 @@
+# Stores on disk what the GUIs need to know about the Graphite commands,
+# shared by PyGraphite (auto_gui.MenuMap) and GraphiteInBlender (MenuMap and
+# operators). It does not depend on polyscope, so that it can be used in
+# Blender.
+
+import os, json, hashlib
+import gompy, gompy.gom as gom, gompy.types.OGF as OGF
+
+#===============================================================================
+
+class ReflectionCache:
+    """
+    @brief Stores on disk the menus and signatures of the Graphite commands
+    @details Getting the menus and the arguments of the commands through GOM
+      reflection is costly at startup. The result is stored in a file,
+      loaded by the next sessions. The file is discarded whenever the gompy
+      build changes. Commands classes declared in Python are always
+      reflected, since they may change between two sessions.
+    """
+    FORMAT = 2
+    filename = os.path.join(
+        os.path.expanduser('~'), '.cache', 'pygraphite', 'commands.json'
+    ) # set to None to disable the file
+    commands = None          # commands class name -> (menu name, items)
+    python_commands = set()  # commands classes declared in Python
+    modified = False
+    key = None               # computed once by build_key()
+
+    def build_key() -> str:
+        """
+        @brief Gets a string that identifies the gompy build
+        @details The key is computed once, then reused
+        @return the format of the file and a hash of the names, sizes and
+          modification times of the files of gompy (the files of the
+          package and its subdirectories, where the compiled libraries may
+          be, or the extension module if gompy is not a package)
+        """
+        if ReflectionCache.key != None:
+            return ReflectionCache.key
+        files = []
+        if hasattr(gompy, '__path__'):
+            for gompy_dir in gompy.__path__:
+                for root, dirs, filenames in os.walk(gompy_dir):
+                    dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+                    for f in sorted(filenames):
+                        path = os.path.join(root, f)
+                        stat = os.stat(path)
+                        files.append((path, stat.st_size, stat.st_mtime_ns))
+        else:
+            stat = os.stat(gompy.__file__)
+            files.append((gompy.__file__, stat.st_size, stat.st_mtime_ns))
+        digest = hashlib.sha1(repr(files).encode()).hexdigest()
+        ReflectionCache.key = str(ReflectionCache.FORMAT) + ':' + digest
+        return ReflectionCache.key
+
+    def load():
+        """
+        @brief Loads the file, if not already done
+        @details The content of the file is ignored if it does not exist,
+          cannot be read or was created by another gompy build.
+        """
+        if ReflectionCache.commands != None:
+            return
+        ReflectionCache.commands = {}
+        if ReflectionCache.filename == None:
+            return
+        try:
+            with open(ReflectionCache.filename) as f:
+                data = json.load(f)
+            if data['key'] == ReflectionCache.build_key():
+                ReflectionCache.commands = data['commands']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save():
+        """ @brief Saves the file, if new commands classes were reflected """
+        if not ReflectionCache.modified or ReflectionCache.filename == None:
+            return
+        ReflectionCache.modified = False
+        data = {
+            'key' : ReflectionCache.build_key(),
+            'commands' : ReflectionCache.commands
+        }
+        tmpfilename = ReflectionCache.filename + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(ReflectionCache.filename),exist_ok=True)
+            with open(tmpfilename, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmpfilename, ReflectionCache.filename)
+        except OSError as e:
+            print('Warning: could not save ', ReflectionCache.filename, e)
+
+    def clear():
+        """ @brief Discards the cached commands (in memory and on disk) """
+        ReflectionCache.commands = {}
+        if ReflectionCache.filename != None:
+            try:
+                os.remove(ReflectionCache.filename)
+            except OSError:
+                pass
+
+    def get_commands(command_class_name: str) -> tuple:
+        """
+        @brief Gets the menu items of a commands class
+        @param[in] command_class_name the name of the commands class, for
+          instance 'OGF::MeshGrobSurfaceCommands'
+        @return the default menu name of the commands and a list of
+          (container class name, method name, menu or None, help, args)
+          tuples, where args is a list of (name, type name, default value
+          as a string or None, help) tuples
+        """
+        if command_class_name in ReflectionCache.python_commands:
+            return ReflectionCache.reflect_commands(command_class_name)
+        ReflectionCache.load()
+        result = ReflectionCache.commands.get(command_class_name, None)
+        if result == None:
+            result = ReflectionCache.reflect_commands(command_class_name)
+            ReflectionCache.commands[command_class_name] = result
+            ReflectionCache.modified = True
+        return result
+
+    def reflect_commands(command_class_name: str) -> tuple:
+        """
+        @brief Gets the menu items of a commands class using GOM reflection
+        @details Used internally by get_commands()
+        @param[in] command_class_name the name of the commands class
+        @return the default menu name of the commands and the list of
+          items, see get_commands()
+        """
+        default_menu_name = command_class_name
+        mclass = gom.resolve_meta_type(command_class_name)
+        # Command may be associated with a base class, so we find
+        # the name of this base class in the 'grob_class_name' attribute
+        # of the Command and strip it to generate the menu name.
+        default_menu_name = default_menu_name.removeprefix(
+            mclass.custom_attribute_value('grob_class_name')
+        )
+        default_menu_name = default_menu_name.removesuffix('Commands')
+        items = []
+        for i in range(mclass.nb_slots()):
+            mslot = mclass.ith_slot(i)
+            # Skip Object and Node functions, we don't want them to
+            # appear in the GUI
+            if (
+                OGF.Object.find_member(mslot.name)!=None
+                    or
+                OGF.Node.find_member(mslot.name)  !=None
+            ):
+                continue
+            submenu_name = None
+            if mslot.has_custom_attribute('menu'):
+                submenu_name = mslot.custom_attribute_value('menu')
+            help = ''
+            if mslot.has_custom_attribute('help'):
+                help = mslot.custom_attribute_value('help')
+            items.append((
+                mslot.container_meta_class().name, mslot.name,
+                submenu_name, help, ReflectionCache.reflect_args(mslot)
+            ))
+        return (default_menu_name, items)
+
+    def reflect_args(mmethod: OGF.MetaMethod) -> list:
+        """
+        @brief Gets the arguments of a method using GOM reflection
+        @details Used internally by reflect_commands()
+        @param[in] mmethod the meta-method
+        @return a list of (name, type name, default value as a string or
+          None, help or None) tuples
+        """
+        args = []
+        for i in range(mmethod.nb_args()):
+            default = None
+            if mmethod.ith_arg_has_default_value(i):
+                default = mmethod.ith_arg_default_value_as_string(i)
+            help = None
+            if mmethod.ith_arg_has_custom_attribute(i,'help'):
+                help = mmethod.ith_arg_custom_attribute_value(i,'help')
+            args.append((
+                mmethod.ith_arg_name(i), mmethod.ith_arg_type(i).name,
+                default, help
+            ))
+        return args
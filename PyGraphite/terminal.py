@@ -1,7 +1,8 @@
 from rlcompleter import Completer
 import polyscope as ps, polyscope.imgui as imgui
-import sys
+import sys, time
 import gompy.gom as gom
+from profiler import Profiler
 
 #=========================================================================
 
@@ -36,6 +37,98 @@ def longestCommonPrefix(a):
 
 #=========================================================================
 
+class LineBuffer:
+    """
+    @brief Stores the last lines printed in the terminal
+    @details A ring buffer with a maximum number of lines. When it is full,
+      the oldest lines are discarded, and optionally appended to a log file.
+    """
+
+    def __init__(self, max_lines: int = 10000, log_filename: str = None):
+        """
+        @brief LineBuffer constructor
+        @param[in] max_lines maximum number of lines kept in memory (at
+          least 1)
+        @param[in] log_filename optional file where discarded lines are
+          appended, or None
+        """
+        self.lines = [None] * max(max_lines, 1)
+        self.head = 0      # index of the oldest line in self.lines
+        self.nb_lines = 0
+        self.log_filename = log_filename
+        self.log_file = None
+
+    def __len__(self) -> int:
+        return self.nb_lines
+
+    def __getitem__(self, i: int) -> str:
+        """
+        @brief Gets a line
+        @param[in] i the index of the line, 0 for the oldest one
+        @return the line, without end-of-line
+        """
+        return self.lines[(self.head + i) % len(self.lines)]
+
+    def append(self, line: str):
+        """
+        @brief Appends a line, discards the oldest one if buffer is full
+        @param[in] line the line, without end-of-line
+        """
+        if self.nb_lines == len(self.lines):
+            self.spill(self.lines[self.head])
+            self.lines[self.head] = line
+            self.head = (self.head + 1) % len(self.lines)
+        else:
+            self.lines[(self.head + self.nb_lines) % len(self.lines)] = line
+            self.nb_lines = self.nb_lines + 1
+
+    def spill(self, line: str):
+        """
+        @brief Writes a discarded line to the log file, if there is one
+        @details The file is flushed after each line, so that no line is
+          lost if the application crashes
+        @param[in] line the line, without end-of-line
+        """
+        if self.log_filename == None:
+            return
+        if self.log_file == None:
+            self.log_file = open(self.log_filename, 'a')
+        self.log_file.write(line + '\n')
+        self.log_file.flush()
+
+    def set_max_lines(self, max_lines: int):
+        """
+        @brief Changes the maximum number of lines kept in memory
+        @details If there are more lines, the oldest ones are discarded
+        @param[in] max_lines the new maximum number of lines (at least 1)
+        """
+        max_lines = max(max_lines, 1)
+        lines = [ self[i] for i in range(self.nb_lines) ]
+        for line in lines[:max(len(lines) - max_lines, 0)]:
+            self.spill(line)
+        lines = lines[max(len(lines) - max_lines, 0):]
+        self.nb_lines = len(lines)
+        self.head = 0
+        self.lines = lines + [None] * (max_lines - len(lines))
+
+    def clear(self):
+        """ @brief Discards all the lines and closes the log file """
+        self.lines = [None] * len(self.lines)
+        self.head = 0
+        self.nb_lines = 0
+        self.close()
+
+    def close(self):
+        """
+        @brief Closes the log file, if it is open
+        @details It is opened again if more lines are discarded
+        """
+        if self.log_file != None:
+            self.log_file.close()
+            self.log_file = None
+
+#=========================================================================
+
 class Terminal:
 
     def __init__(self, app):
@@ -44,8 +137,12 @@ class Terminal:
         self.queued_execute_command = False
         self.command_widget_id = 0
         self.completer = Completer()
-        self.message = ''
+        self.lines = LineBuffer()  # complete lines
+        self.partial_line = ''     # last line, not terminated yet
         self.update_frames = 0
+        self.max_redraws_per_second = 10 # while commands print messages
+        self.last_redraw_time = 0.0
+        self.flush_pending = False # True if a flush() was throttled
         self.focus = False
         self.app = app
         self.debug_mode = self.app.debug_mode
@@ -84,7 +181,7 @@ class Terminal:
         imgui.SetNextWindowSize([600,200],imgui.ImGuiCond_Once)
         _,self.visible = imgui.Begin('Terminal', self.visible)
         imgui.BeginChild('scrolling',[0.0,-25.0])
-        imgui.Text(self.message)
+        self.draw_lines()
         if self.update_frames > 0:
             imgui.SetScrollY(imgui.GetScrollMaxY())
             self.update_frames = self.update_frames - 1
@@ -112,6 +209,29 @@ class Terminal:
         imgui.PopItemWidth()
         imgui.End()
 
+    def draw_lines(self):
+        """
+        @brief Draws the lines of the terminal
+        @details Only the visible lines are drawn, the other ones are
+          replaced with empty space (all lines have the same height)
+        """
+        nb_lines = len(self.lines) + (1 if self.partial_line != '' else 0)
+        line_height = imgui.GetTextLineHeightWithSpacing()
+        first = max(int(imgui.GetScrollY() / line_height) - 1, 0)
+        last = min(
+            first + int(imgui.GetContentRegionAvail()[1] / line_height) + 3,
+            nb_lines
+        )
+        if first > 0:
+            imgui.Dummy([1, first * line_height])
+        for i in range(first, last):
+            if i < len(self.lines):
+                imgui.Text(self.lines[i])
+            else:
+                imgui.Text(self.partial_line)
+        if last < nb_lines:
+            imgui.Dummy([1, (nb_lines - last) * line_height])
+
     def print(self, msg: str):
         """
         @brief Prints a message to the terminal window in Graphite
@@ -128,7 +248,10 @@ class Terminal:
             self.printing = False
         else:
             self.printing = True
-            self.message = self.message + msg
+            lines = (self.partial_line + msg).split('\n')
+            for line in lines[:-1]:
+                self.lines.append(line)
+            self.partial_line = lines[-1]
             self.update_frames = 3 # needs three frames for SetScrollY()
                                    # to do the job
             self.printing = False
@@ -195,10 +318,11 @@ class Terminal:
           only, (normally) there can't be nested PolyScope frames.
         @param[in] msg the message to be displayed
         """
+        if not self.app.in_main_thread(): # command running in background
+            self.app.post_to_main_thread(self.out_CB, msg)
+            return
         self.print(msg)
-        if not self.printing and not self.app.drawing:
-            while self.app.running and self.update_frames > 0:
-                self.app.redraw()
+        self.flush()
 
     def err_CB(self,msg:str):
         """
@@ -209,8 +333,33 @@ class Terminal:
           only, (normally) there can't be nested PolyScope frames.
         @param[in] msg the error message to be displayed
         """
+        if not self.app.in_main_thread(): # command running in background
+            self.app.post_to_main_thread(self.err_CB, msg)
+            return
         self.visible=True # make terminal appear if it was hidden
         self.print(msg)
-        if not self.printing and not self.app.drawing:
+        self.flush(True) # errors are always displayed immediately
+
+    def flush(self, force: bool = False):
+        """
+        @brief Displays the messages printed since last frame
+        @details Generates the frames needed to scroll to the last line,
+          at most max_redraws_per_second times per second. Messages printed
+          in-between are marked as pending, and displayed by the next
+          callback (message or progress) or by the next frame of the
+          application main loop.
+        @param[in] force if True, messages are displayed immediately
+        """
+        if self.printing or self.app.drawing or not self.app.running:
+            return
+        if not force and (
+            time.perf_counter() - self.last_redraw_time <
+            1.0 / self.max_redraws_per_second
+        ):
+            self.flush_pending = True
+            return
+        self.flush_pending = False
+        with Profiler.scope('terminal redraw', 'terminal'):
             while self.app.running and self.update_frames > 0:
                 self.app.redraw()
+        self.last_redraw_time = time.perf_counter()